@@ -1,8 +1,59 @@
 import numpy as np
 import json
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Union
 from datetime import datetime, timedelta
-from src.models.student import Student, GameSession, QuizResult
+from src.models.student import db, Student, GameSession, SessionRecord, QuizResult, DifficultyState
+from src.metrics import timed
+from src.profile_rules import (
+    LEARNING_PREFERENCE, FAVORITE_ACTIVITIES, STEAM_ACTIVITIES, CHALLENGE_PREFERENCE
+)
+
+# Sessões ORM e registros somente leitura são aceitos da mesma forma
+SessionLike = Union[GameSession, SessionRecord]
+
+class LearningContext:
+    """
+    Dados de um estudante carregados uma vez por requisição, com número fixo de
+    consultas: o estudante, o perfil decodificado e as sessões mais recentes
+    agrupadas por tipo de jogo (mais recente primeiro). Os métodos *_for do
+    motor trabalham só com este contexto, sem acessar o banco.
+    """
+    
+    def __init__(self, student: Student, profile: Dict[str, Any],
+                 sessions_by_game: Dict[str, List[SessionLike]]):
+        self.student = student
+        self.profile = profile
+        self.sessions_by_game = sessions_by_game
+    
+    @classmethod
+    def load(cls, student_id: int = None, student: Student = None, limit: int = 5) -> 'LearningContext':
+        """
+        Carrega o contexto (até 2 consultas). Retorna None se o estudante não existir.
+        """
+        if student is None:
+            student = Student.query.get(student_id)
+            if not student:
+                return None
+        
+        sessions_by_game = {}
+        for session in GameSession.recent_by_game_records(student.id, limit):
+            sessions_by_game.setdefault(session.game_type, []).append(session)
+        
+        return cls(student, student.get_learning_profile(), sessions_by_game)
+    
+    @property
+    def student_id(self) -> int:
+        return self.student.id
+    
+    def recent_sessions(self, game_type: str = None, limit: int = 5) -> List[SessionLike]:
+        """Sessões mais recentes de um jogo ou, sem game_type, de todos os jogos"""
+        if game_type:
+            return self.sessions_by_game.get(game_type, [])[:limit]
+        
+        # As `limit` mais recentes no geral estão entre as `limit` mais recentes de cada jogo
+        sessions = [s for game_sessions in self.sessions_by_game.values() for s in game_sessions]
+        sessions.sort(key=lambda s: s.created_at, reverse=True)
+        return sessions[:limit]
 
 class AdaptiveLearningEngine:
     """
@@ -22,6 +73,9 @@ class AdaptiveLearningEngine:
         self.max_difficulty = 10
         self.difficulty_step = 0.5
         
+        # Cache de resultados (ver src.result_cache); None desativa
+        self.result_cache = None
+        
         # Tipos de jogos e suas características
         self.game_types = {
             'math': {
@@ -50,6 +104,7 @@ class AdaptiveLearningEngine:
             }
         }
     
+    @timed('engine.analyze_learning_profile')
     def analyze_learning_profile(self, quiz_answers: Dict[str, Any]) -> Dict[str, Any]:
         """
         Analisa as respostas do quiz inicial para criar um perfil de aprendizagem.
@@ -70,6 +125,15 @@ class AdaptiveLearningEngine:
         
         return profile
     
+    @timed('engine.analyze_learning_profiles')
+    def analyze_learning_profiles(self, answer_sets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Perfis de aprendizagem de um lote de quizzes (importação em massa). As
+        tabelas de regras guardam o resultado de cada texto já analisado, então
+        respostas repetidas no lote não são processadas de novo.
+        """
+        return [self.analyze_learning_profile(answers) for answers in answer_sets]
+    
     def _determine_learning_style(self, answers: Dict[str, Any]) -> str:
         """Determina o estilo de aprendizagem predominante"""
         styles = {
@@ -81,27 +145,13 @@ class AdaptiveLearningEngine:
         
         # Análise baseada nas respostas sobre preferências de aprendizagem
         if 'learning_preference' in answers:
-            pref = answers['learning_preference']
-            if 'visual' in pref or 'images' in pref or 'diagrams' in pref:
-                styles['visual'] += 2
-            if 'audio' in pref or 'listening' in pref or 'music' in pref:
-                styles['auditory'] += 2
-            if 'hands_on' in pref or 'practice' in pref or 'movement' in pref:
-                styles['kinesthetic'] += 2
-            if 'reading' in pref or 'writing' in pref or 'text' in pref:
-                styles['reading_writing'] += 2
+            for style in LEARNING_PREFERENCE.categories_in(answers['learning_preference']):
+                styles[style] += 2
         
         # Análise baseada em atividades preferidas
         if 'favorite_activities' in answers:
-            activities = answers['favorite_activities']
-            if any(act in activities for act in ['drawing', 'watching', 'observing']):
-                styles['visual'] += 1
-            if any(act in activities for act in ['music', 'talking', 'listening']):
-                styles['auditory'] += 1
-            if any(act in activities for act in ['sports', 'building', 'experimenting']):
-                styles['kinesthetic'] += 1
-            if any(act in activities for act in ['reading', 'writing', 'researching']):
-                styles['reading_writing'] += 1
+            for style in FAVORITE_ACTIVITIES.categories_in(answers['favorite_activities']):
+                styles[style] += 1
         
         return max(styles, key=styles.get)
     
@@ -137,25 +187,11 @@ class AdaptiveLearningEngine:
             'refletir': 0.0
         }
         
-        # Mapeamento de atividades para elementos STEAM
-        activity_mapping = {
-            'research': 'investigar',
-            'explore': 'descobrir',
-            'collaborate': 'conectar',
-            'build': 'criar',
-            'analyze': 'refletir',
-            'experiment': 'investigar',
-            'discover': 'descobrir',
-            'connect': 'conectar',
-            'create': 'criar',
-            'think': 'refletir'
-        }
-        
+        # Cada palavra-chave de atividade (profile_rules.STEAM_ACTIVITIES) soma 1 ao seu elemento
         if 'preferred_activities' in answers:
             for activity in answers['preferred_activities']:
-                for key, steam_element in activity_mapping.items():
-                    if key in activity.lower():
-                        steam_scores[steam_element] += 1.0
+                for steam_element, count in STEAM_ACTIVITIES.count(activity).items():
+                    steam_scores[steam_element] += count
         
         # Normalizar scores
         total = sum(steam_scores.values())
@@ -172,13 +208,7 @@ class AdaptiveLearningEngine:
     def _determine_difficulty_preference(self, answers: Dict[str, Any]) -> str:
         """Determina a preferência de dificuldade inicial"""
         if 'challenge_preference' in answers:
-            pref = answers['challenge_preference'].lower()
-            if 'easy' in pref or 'simple' in pref:
-                return 'low'
-            elif 'hard' in pref or 'difficult' in pref or 'challenge' in pref:
-                return 'high'
-            else:
-                return 'medium'
+            return CHALLENGE_PREFERENCE.first_category(answers['challenge_preference'], 'medium')
         return 'medium'
     
     def _identify_motivation_factors(self, answers: Dict[str, Any]) -> List[str]:
@@ -193,6 +223,7 @@ class AdaptiveLearningEngine:
         
         return list(set(factors + default_factors))
     
+    @timed('engine.calculate_next_difficulty')
     def calculate_next_difficulty(self, student_id: int, game_type: str) -> float:
         """
         Calcula o próximo nível de dificuldade para um estudante em um tipo específico de jogo.
@@ -204,23 +235,154 @@ class AdaptiveLearningEngine:
         Returns:
             Nível de dificuldade recomendado (1.0 - 10.0)
         """
+        # Estado mantido a cada sessão registrada: uma única busca por chave
+        state = DifficultyState.query.get((student_id, game_type))
+        if state is not None:
+            return state.next_difficulty
+        
         # Buscar histórico de sessões do estudante
         recent_sessions = self._get_recent_sessions(student_id, game_type, limit=5)
         
+        profile = None
         if not recent_sessions:
             # Primeira vez jogando - usar preferência do perfil
+            student = Student.query.get(student_id)
+            if not student:
+                return 4.0  # Dificuldade padrão
+            profile = student.get_learning_profile()
+        
+        return self._difficulty_from_sessions(recent_sessions, profile)
+    
+    def next_difficulty_for(self, context: LearningContext, game_type: str) -> float:
+        """Próxima dificuldade calculada apenas a partir do contexto já carregado"""
+        return self._difficulty_from_sessions(context.recent_sessions(game_type), context.profile)
+    
+    @timed('engine.update_difficulty_states')
+    def update_difficulty_states(self, sessions: List[GameSession]) -> Dict[Tuple[int, str], DifficultyState]:
+        """
+        Atualiza os estados de dificuldade dos pares (estudante, jogo) com novas
+        sessões: uma consulta para as janelas de todos os pares, cada estado
+        recalculado uma única vez e uma instrução para gravá-los. Deve ser
+        chamado antes de as sessões serem inseridas (ver
+        DifficultyState.windows_for_pairs) e antes do commit.
+        """
+        sessions_by_pair = {}
+        for session in sessions:
+            if session.created_at is None:
+                session.created_at = datetime.utcnow()
+            sessions_by_pair.setdefault((session.student_id, session.game_type), []).append(session)
+        
+        states = {}
+        for (student_id, game_type), window in DifficultyState.windows_for_pairs(sessions_by_pair).items():
+            state = DifficultyState(student_id=student_id, game_type=game_type)
+            state.set_window(window)
+            window = state.push(*sessions_by_pair[(student_id, game_type)])
+            state.next_difficulty = self._difficulty_from_sessions(window)
+            states[(student_id, game_type)] = state
+        
+        DifficultyState.save_all(states.values())
+        return states
+    
+    @timed('engine.preview_next_difficulty')
+    def preview_next_difficulty(self, session: GameSession) -> float:
+        """
+        Próxima dificuldade considerando uma sessão que ainda não foi gravada
+        (modo write-behind), a partir do estado persistido do par.
+        """
+        state = DifficultyState.query.get((session.student_id, session.game_type))
+        if state is not None:
+            window = state.get_window()
+        else:
+            window = self._get_recent_sessions(session.student_id, session.game_type, limit=5)
+        
+        window = sorted(list(window) + [session], key=lambda s: s.created_at, reverse=True)
+        return self._difficulty_from_sessions(window[:DifficultyState.window_size])
+    
+    def rebuild_difficulty_states(self) -> int:
+        """Reconstrói todos os estados de dificuldade a partir de game_sessions"""
+        DifficultyState.query.delete()
+        
+        states = {}
+        for session in GameSession.recent_by_game_records(None, DifficultyState.window_size):
+            states.setdefault((session.student_id, session.game_type), []).append(session)
+        
+        for (student_id, game_type), sessions in states.items():
+            state = DifficultyState(student_id=student_id, game_type=game_type)
+            state.set_window(sessions)
+            state.next_difficulty = self._difficulty_from_sessions(sessions)
+            db.session.add(state)
+        
+        db.session.commit()
+        return len(states)
+    
+    def verify_difficulty_states(self) -> List[Tuple[int, str, float, float]]:
+        """
+        Compara cada estado persistido com o cálculo original
+        (_reference_next_difficulty) e retorna as divergências.
+        """
+        mismatches = []
+        for state in DifficultyState.query.all():
+            expected = self._reference_next_difficulty(state.student_id, state.game_type)
+            from_window = self._difficulty_from_sessions(state.get_window())
+            if expected != state.next_difficulty or expected != from_window:
+                mismatches.append((state.student_id, state.game_type, expected, state.next_difficulty))
+        return mismatches
+    
+    def _reference_next_difficulty(self, student_id: int, game_type: str) -> float:
+        """
+        Cálculo original de calculate_next_difficulty, anterior a DifficultyState:
+        consulta as 5 sessões mais recentes (objetos GameSession) e calcula o
+        ajuste diretamente. Mantido apenas como referência para a verificação.
+        """
+        recent_sessions = GameSession.query.filter_by(
+            student_id=student_id,
+            game_type=game_type
+        ).order_by(GameSession.created_at.desc()).limit(5).all()
+        
+        if not recent_sessions:
             student = Student.query.get(student_id)
             if student:
-                profile = student.get_learning_profile()
-                difficulty_pref = profile.get('difficulty_preference', 'medium')
-                
-                difficulty_map = {
-                    'low': 2.0,
-                    'medium': 4.0,
-                    'high': 6.0
-                }
-                return difficulty_map.get(difficulty_pref, 4.0)
-            return 4.0  # Dificuldade padrão
+                difficulty_pref = student.get_learning_profile().get('difficulty_preference', 'medium')
+                return {'low': 2.0, 'medium': 4.0, 'high': 6.0}.get(difficulty_pref, 4.0)
+            return 4.0
+        
+        performance_score = self._calculate_performance_score(recent_sessions)
+        time_efficiency = self._calculate_time_efficiency(recent_sessions)
+        progression_rate = self._calculate_progression_rate(recent_sessions)
+        
+        current_difficulty = recent_sessions[0].difficulty_level
+        
+        performance_factor = (performance_score - 0.7) * 2
+        time_factor = (time_efficiency - 0.5) * 1
+        progression_factor = progression_rate * 0.5
+        
+        total_adjustment = (
+            performance_factor * self.performance_weight +
+            time_factor * self.time_weight +
+            progression_factor * self.difficulty_progression_weight
+        )
+        
+        new_difficulty = current_difficulty + (total_adjustment * self.difficulty_step)
+        new_difficulty = max(self.min_difficulty, min(self.max_difficulty, new_difficulty))
+        
+        return round(new_difficulty, 1)
+    
+    def _difficulty_from_sessions(self, recent_sessions: List[SessionLike], profile: Dict = None) -> float:
+        """
+        Calcula a próxima dificuldade a partir das sessões recentes já carregadas
+        (mais recente primeiro). Sem sessões, usa a preferência do perfil.
+        """
+        if not recent_sessions:
+            if profile is None:
+                return 4.0  # Dificuldade padrão
+            difficulty_pref = profile.get('difficulty_preference', 'medium')
+            
+            difficulty_map = {
+                'low': 2.0,
+                'medium': 4.0,
+                'high': 6.0
+            }
+            return difficulty_map.get(difficulty_pref, 4.0)
         
         # Analisar desempenho recente
         performance_score = self._calculate_performance_score(recent_sessions)
@@ -249,14 +411,11 @@ class AdaptiveLearningEngine:
         
         return round(new_difficulty, 1)
     
-    def _get_recent_sessions(self, student_id: int, game_type: str, limit: int = 5) -> List[GameSession]:
+    def _get_recent_sessions(self, student_id: int, game_type: str, limit: int = 5) -> List[SessionRecord]:
         """Busca as sessões mais recentes de um estudante para um tipo de jogo"""
-        return GameSession.query.filter_by(
-            student_id=student_id,
-            game_type=game_type
-        ).order_by(GameSession.created_at.desc()).limit(limit).all()
+        return GameSession.records(GameSession.recent_query(student_id, game_type, limit))
     
-    def _calculate_performance_score(self, sessions: List[GameSession]) -> float:
+    def _calculate_performance_score(self, sessions: List[SessionLike]) -> float:
         """Calcula a pontuação média de desempenho"""
         if not sessions:
             return 0.5
@@ -264,7 +423,7 @@ class AdaptiveLearningEngine:
         scores = [session.score for session in sessions]
         return np.mean(scores)
     
-    def _calculate_time_efficiency(self, sessions: List[GameSession]) -> float:
+    def _calculate_time_efficiency(self, sessions: List[SessionLike]) -> float:
         """Calcula a eficiência de tempo (menor tempo = maior eficiência)"""
         if not sessions:
             return 0.5
@@ -281,7 +440,7 @@ class AdaptiveLearningEngine:
         efficiency = max(0.1, min(1.0, expected_time / avg_time))
         return efficiency
     
-    def _calculate_progression_rate(self, sessions: List[GameSession]) -> float:
+    def _calculate_progression_rate(self, sessions: List[SessionLike]) -> float:
         """Calcula a taxa de progressão do estudante"""
         if len(sessions) < 2:
             return 0.0
@@ -299,22 +458,196 @@ class AdaptiveLearningEngine:
         
         return 0.0
     
-    def recommend_games(self, student_id: int, num_recommendations: int = 3) -> List[Dict[str, Any]]:
+    @timed('engine.calculate_cohort_difficulties')
+    def calculate_cohort_difficulties(self, student_ids: List[int] = None,
+                                      grade_level: str = None) -> Dict[int, Dict[str, float]]:
+        """
+        Calcula a próxima dificuldade de todos os pares (estudante, jogo) de uma
+        turma ou escola de forma vetorizada. O resultado de cada par é idêntico
+        ao de calculate_next_difficulty.
+        
+        Args:
+            student_ids: IDs dos estudantes (None = todos)
+            grade_level: Filtra os estudantes por série
+            
+        Returns:
+            Dicionário {student_id: {game_type: dificuldade}}
+        """
+        students_query = Student.query
+        if student_ids is not None:
+            students_query = students_query.filter(Student.id.in_(student_ids))
+        if grade_level:
+            students_query = students_query.filter_by(grade_level=grade_level)
+        students = students_query.order_by(Student.id).all()
+        
+        if not students:
+            return {}
+        
+        game_list = list(self.game_types)
+        columns = self._load_cohort_columns(
+            students_query.with_entities(Student.id), students, game_list
+        )
+        difficulties, counts = self._vectorized_next_difficulty(
+            columns, len(students) * len(game_list)
+        )
+        
+        difficulty_map = {'low': 2.0, 'medium': 4.0, 'high': 6.0}
+        result = {}
+        for i, student in enumerate(students):
+            default = difficulty_map.get(
+                student.get_learning_profile().get('difficulty_preference', 'medium'), 4.0
+            )
+            result[student.id] = {
+                game_type: float(difficulties[i * len(game_list) + j])
+                if counts[i * len(game_list) + j] else default
+                for j, game_type in enumerate(game_list)
+            }
+        return result
+    
+    def _load_cohort_columns(self, student_ids_query, students: List[Student],
+                             game_list: List[str], limit: int = 5) -> Dict[str, np.ndarray]:
+        """
+        Carrega, em uma única consulta, as `limit` sessões mais recentes de cada
+        par (estudante, jogo) como arrays colunares.
+        """
+        ranked = db.session.query(
+            GameSession.student_id,
+            GameSession.game_type,
+            GameSession.score,
+            GameSession.time_spent,
+            GameSession.difficulty_level,
+            GameSession.created_at,
+            db.func.row_number().over(
+                partition_by=(GameSession.student_id, GameSession.game_type),
+                order_by=GameSession.created_at.desc()
+            ).label('rn')
+        ).filter(
+            GameSession.student_id.in_(student_ids_query),
+            GameSession.game_type.in_(game_list)
+        ).subquery()
+        
+        rows = db.session.query(ranked).filter(ranked.c.rn <= limit).all()
+        
+        student_index = {student.id: i for i, student in enumerate(students)}
+        game_index = {game_type: j for j, game_type in enumerate(game_list)}
+        
+        return {
+            'limit': limit,
+            'pair': np.array(
+                [student_index[r[0]] * len(game_list) + game_index[r[1]] for r in rows],
+                dtype=np.int64
+            ),
+            'rank': np.array([r[6] - 1 for r in rows], dtype=np.int64),
+            'score': np.array([r[2] for r in rows], dtype=np.float64),
+            'time_spent': np.array([r[3] for r in rows], dtype=np.float64),
+            'difficulty': np.array([r[4] for r in rows], dtype=np.float64),
+            'created_at': np.array([r[5] for r in rows], dtype='datetime64[us]').astype(np.int64)
+        }
+    
+    def _vectorized_next_difficulty(self, columns: Dict[str, np.ndarray],
+                                    num_pairs: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Versão vetorizada de _difficulty_from_sessions para vários pares.
+        
+        Returns:
+            Tupla (dificuldades, número de sessões) indexada pelo par
+        """
+        limit = columns['limit']
+        pair, rank = columns['pair'], columns['rank']
+        
+        # Matrizes (pares x janela), da sessão mais recente para a mais antiga
+        scores = np.zeros((num_pairs, limit))
+        times = np.zeros((num_pairs, limit))
+        difficulties = np.zeros((num_pairs, limit))
+        created = np.full((num_pairs, limit), np.iinfo(np.int64).max, dtype=np.int64)
+        scores[pair, rank] = columns['score']
+        times[pair, rank] = columns['time_spent']
+        difficulties[pair, rank] = columns['difficulty']
+        created[pair, rank] = columns['created_at']
+        counts = np.bincount(pair, minlength=num_pairs)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Desempenho
+            performance_score = scores.sum(axis=1) / counts
+            
+            # Eficiência de tempo
+            avg_time = times.sum(axis=1) / counts
+            avg_difficulty = (difficulties.sum(axis=1) / counts).astype(np.int64)
+            expected_time = np.where(
+                (avg_difficulty >= 1) & (avg_difficulty <= 10), 60 + avg_difficulty * 30, 180
+            )
+            time_efficiency = np.clip(expected_time / avg_time, 0.1, 1.0)
+            
+            # Progressão (mesma ordenação estável de _calculate_progression_rate)
+            order = np.argsort(created, axis=1, kind='stable')
+            ascending_scores = np.take_along_axis(scores, order, axis=1)
+            half = counts // 2
+            position = np.arange(limit)
+            first_mask = position < half[:, None]
+            last_mask = (position >= half[:, None]) & (position < counts[:, None])
+            first_avg = np.where(first_mask, ascending_scores, 0.0).sum(axis=1) / half
+            last_avg = np.where(last_mask, ascending_scores, 0.0).sum(axis=1) / (counts - half)
+            progression_rate = np.where(
+                counts >= 2, np.maximum(0.0, last_avg - first_avg), 0.0
+            )
+        
+        performance_factor = (performance_score - 0.7) * 2
+        time_factor = (time_efficiency - 0.5) * 1
+        progression_factor = progression_rate * 0.5
+        
+        total_adjustment = (
+            performance_factor * self.performance_weight +
+            time_factor * self.time_weight +
+            progression_factor * self.difficulty_progression_weight
+        )
+        
+        new_difficulty = difficulties[:, 0] + (total_adjustment * self.difficulty_step)
+        new_difficulty = np.clip(new_difficulty, self.min_difficulty, self.max_difficulty)
+        
+        return np.round(new_difficulty, 1), counts
+    
+    @timed('engine.recommend_games')
+    def recommend_games(self, student_id: int, num_recommendations: int = 3,
+                        context: LearningContext = None) -> List[Dict[str, Any]]:
         """
         Recomenda jogos para um estudante baseado em seu perfil e desempenho.
         
         Args:
             student_id: ID do estudante
             num_recommendations: Número de recomendações a retornar
+            context: Contexto já carregado na requisição (opcional)
             
         Returns:
             Lista de recomendações de jogos
         """
-        student = Student.query.get(student_id)
+        student = context.student if context else Student.query.get(student_id)
         if not student:
             return []
         
-        profile = student.get_learning_profile()
+        # O resultado só muda com uma nova sessão ou com outro perfil
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = (
+                'recommend_games', student.id, GameSession.last_id(student.id),
+                student.updated_at.isoformat() if student.updated_at else None,
+                num_recommendations
+            )
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        # Uma única consulta para as sessões recentes de todos os jogos
+        context = context or LearningContext.load(student=student)
+        recommendations = self.recommend_games_for(context, num_recommendations)
+        
+        if cache_key is not None:
+            self.result_cache.set(cache_key, recommendations)
+        
+        return recommendations
+    
+    def recommend_games_for(self, context: LearningContext, num_recommendations: int = 3) -> List[Dict[str, Any]]:
+        """Recomendações calculadas apenas a partir do contexto já carregado"""
+        profile = context.profile
         interests = profile.get('interests', [])
         steam_preferences = profile.get('steam_preferences', {})
         
@@ -327,7 +660,7 @@ class AdaptiveLearningEngine:
             )
             
             # Calcular dificuldade recomendada
-            difficulty = self.calculate_next_difficulty(student_id, game_type)
+            difficulty = self.next_difficulty_for(context, game_type)
             
             recommendations.append({
                 'game_type': game_type,
@@ -357,6 +690,7 @@ class AdaptiveLearningEngine:
         
         return score
     
+    @timed('engine.generate_feedback')
     def generate_feedback(self, session: GameSession) -> Dict[str, Any]:
         """
         Gera feedback personalizado para uma sessão de jogo.
@@ -370,6 +704,33 @@ class AdaptiveLearningEngine:
         student = Student.query.get(session.student_id)
         profile = student.get_learning_profile() if student else {}
         
+        return self.feedback_for(session, profile)
+    
+    @timed('engine.generate_feedback_batch')
+    def generate_feedback_batch(self, sessions: List[GameSession]) -> List[Dict[str, Any]]:
+        """
+        Gera feedback para várias sessões carregando os perfis dos estudantes
+        envolvidos em uma única consulta.
+        
+        Args:
+            sessions: Sessões de jogo concluídas
+            
+        Returns:
+            Feedbacks na mesma ordem das sessões
+        """
+        student_ids = {session.student_id for session in sessions}
+        profiles = {
+            student.id: student.get_learning_profile()
+            for student in Student.query.filter(Student.id.in_(student_ids)).all()
+        } if student_ids else {}
+        
+        return [
+            self.feedback_for(session, profiles.get(session.student_id, {}))
+            for session in sessions
+        ]
+    
+    def feedback_for(self, session: SessionLike, profile: Dict) -> Dict[str, Any]:
+        """Monta o feedback de uma sessão a partir do perfil já carregado"""
         feedback = {
             'performance_level': self._assess_performance_level(session.score),
             'time_assessment': self._assess_time_performance(session.time_spent, session.difficulty_level),
@@ -1,11 +1,102 @@
-from flask import Blueprint, request, jsonify
-from src.models.student import db, Student, GameSession, QuizResult
-from src.ai_engine import AdaptiveLearningEngine
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from src.models.student import (
+    db, Student, GameSession, SessionRecord, QuizResult, StudentGameStats, profile_cache, insert_all
+)
+from src.ai_engine import AdaptiveLearningEngine, LearningContext
+from src.analytics import (
+    LearningAnalyticsAccumulator, trend_from_averages,
+    game_summaries, student_summaries, grade_summaries
+)
+from src.write_behind import SessionWriteBehind, WriteBehindFull
+from src.content_index import ContentIndex
+from src.question_bank import QuestionBank
+from src.roster_import import import_roster
+from src import json_codec
 from datetime import datetime
+import base64
+import hashlib
+import math
+import os
 
 ai_bp = Blueprint('ai', __name__)
 ai_engine = AdaptiveLearningEngine()
 
+# Fila de gravação assíncrona de sessões (None = gravação síncrona)
+write_behind = None
+
+# Índice de conteúdo dos livros didáticos (None = busca desativada)
+content_index = None
+
+def configure_content_index(app):
+    """Abre o índice de conteúdo em CONTENT_INDEX_PATH, se configurado"""
+    global content_index
+    path = app.config.get('CONTENT_INDEX_PATH')
+    content_index = ContentIndex(path) if path else None
+    return content_index
+
+# Banco de questões compilado (None = sorteio de questões desativado)
+question_bank = None
+
+def configure_question_bank(app):
+    """Abre (mmap) o banco de questões em QUESTION_BANK_PATH, se o arquivo existir"""
+    global question_bank
+    path = app.config.get('QUESTION_BANK_PATH')
+    question_bank = QuestionBank(path) if path and os.path.exists(path) else None
+    return question_bank
+
+def configure_write_behind(app):
+    """Ativa o modo write-behind conforme WRITE_BEHIND_* na configuração da aplicação"""
+    global write_behind
+    if not app.config.get('WRITE_BEHIND_ENABLED'):
+        return None
+    
+    write_behind = SessionWriteBehind(
+        app,
+        persist=_commit_session_records,
+        spool_path=app.config['WRITE_BEHIND_SPOOL_PATH'],
+        max_queue=app.config.get('WRITE_BEHIND_QUEUE_SIZE', 10000),
+        flush_interval=app.config.get('WRITE_BEHIND_FLUSH_INTERVAL', 1.0),
+        flush_size=app.config.get('WRITE_BEHIND_FLUSH_SIZE', 200),
+        fsync=app.config.get('WRITE_BEHIND_FSYNC', True)
+    ).start()
+    return write_behind
+
+def _session_from_record(record):
+    """Cria uma GameSession (ainda fora da sessão do banco) a partir de um registro da fila"""
+    session = GameSession(
+        student_id=record['student_id'],
+        game_type=record['game_type'],
+        difficulty_level=record['difficulty_level'],
+        score=record['score'],
+        time_spent=record['time_spent'],
+        completed=record.get('completed', True),
+        created_at=datetime.fromisoformat(record['created_at'])
+    )
+    session.set_session_data(record.get('session_data', {}))
+    return session
+
+def _add_sessions(sessions):
+    """
+    Insere sessões na transação atual, atualizando os agregados e os estados
+    de dificuldade de todos os pares afetados com um número fixo de
+    instruções, qualquer que seja o tamanho do lote. Retorna o estado final
+    de cada par.
+    """
+    # Estados primeiro: os novos são iniciados com as sessões já gravadas
+    states = ai_engine.update_difficulty_states(sessions)
+    StudentGameStats.record_sessions(sessions)
+    insert_all(sorted(sessions, key=lambda s: s.created_at))
+    return states
+
+def _commit_session_records(records):
+    """Grava um lote da fila write-behind em uma única transação"""
+    try:
+        _add_sessions([_session_from_record(record) for record in records])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
 @ai_bp.route('/analyze-quiz', methods=['POST'])
 def analyze_quiz():
     """
@@ -43,6 +134,7 @@ def analyze_quiz():
         
         db.session.add(quiz_result)
         db.session.commit()
+        profile_cache.invalidate(student_id)
         
         return jsonify({
             'success': True,
@@ -85,6 +177,31 @@ def recommend_difficulty():
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+@ai_bp.route('/cohort-difficulty', methods=['POST'])
+def cohort_difficulty():
+    """
+    Calcula a próxima dificuldade de todos os jogos para uma turma ou escola.
+    """
+    try:
+        data = request.get_json() or {}
+        
+        student_ids = data.get('student_ids')
+        grade_level = data.get('grade_level')
+        
+        if student_ids is not None and not isinstance(student_ids, list):
+            return jsonify({'error': 'Dados inválidos'}), 400
+        
+        difficulties = ai_engine.calculate_cohort_difficulties(student_ids, grade_level)
+        
+        return jsonify({
+            'success': True,
+            'difficulties': {str(student_id): games for student_id, games in difficulties.items()},
+            'students_count': len(difficulties)
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
 @ai_bp.route('/recommend-games', methods=['POST'])
 def recommend_games():
     """
@@ -127,6 +244,9 @@ def record_session():
         if not data or not all(field in data for field in required_fields):
             return jsonify({'error': 'Dados inválidos'}), 400
         
+        if write_behind is not None:
+            return _queue_session(data)
+        
         # Criar nova sessão de jogo
         session = GameSession(
             student_id=data['student_id'],
@@ -134,14 +254,11 @@ def record_session():
             difficulty_level=data['difficulty_level'],
             score=data['score'],
             time_spent=data['time_spent'],
-            completed=data.get('completed', True),
-            session_data=data.get('session_data', {})
+            completed=data.get('completed', True)
         )
+        session.set_session_data(data.get('session_data', {}))
         
-        if 'session_data' in data:
-            session.set_session_data(data['session_data'])
-        
-        db.session.add(session)
+        _add_sessions([session])
         db.session.commit()
         
         # Gerar feedback personalizado
@@ -165,10 +282,186 @@ def record_session():
         db.session.rollback()
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+def _queue_session(data):
+    """
+    Modo write-behind: aceita a sessão na fila e responde com o feedback
+    calculado a partir do registro em memória e do estado já persistido.
+    """
+    student = Student.query.get(data['student_id'])
+    if not student:
+        return jsonify({'error': 'Estudante não encontrado'}), 404
+    
+    record = {
+        'student_id': data['student_id'],
+        'game_type': data['game_type'],
+        'difficulty_level': data['difficulty_level'],
+        'score': data['score'],
+        'time_spent': data['time_spent'],
+        'completed': data.get('completed', True),
+        'session_data': data.get('session_data', {}),
+        'created_at': datetime.utcnow().isoformat()
+    }
+    
+    try:
+        write_behind.submit(record)
+    except WriteBehindFull:
+        response = jsonify({'error': 'Servidor ocupado, tente novamente em instantes'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    
+    session = _session_from_record(record)
+    
+    return jsonify({
+        'success': True,
+        'session_id': None,
+        'queued': True,
+        'feedback': ai_engine.generate_feedback(session),
+        'next_difficulty': ai_engine.preview_next_difficulty(session),
+        'message': 'Sessão registrada com sucesso!'
+    })
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+def _valid_session_item(item):
+    """Verifica campos obrigatórios e tipos de um item de /record-sessions"""
+    if not isinstance(item, dict):
+        return False
+    return (
+        _is_int(item.get('student_id'))
+        and isinstance(item.get('game_type'), str) and bool(item['game_type'].strip())
+        and _is_int(item.get('difficulty_level'))
+        and _is_int(item.get('time_spent'))
+        and _is_number(item.get('score'))
+        and isinstance(item.get('completed', True), bool)
+        and isinstance(item.get('session_data', {}), dict)
+    )
+
+@ai_bp.route('/record-sessions', methods=['POST'])
+def record_sessions():
+    """
+    Registra um lote de sessões de jogo (ex.: buffer offline dos tablets) em uma
+    única transação e gera feedback para cada uma.
+    """
+    try:
+        data = request.get_json()
+        
+        items = data.get('sessions') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'Dados inválidos'}), 400
+        
+        results = [None] * len(items)
+        
+        # Validar cada item antes de agrupar: um item inválido não derruba o lote
+        valid = []
+        for index, item in enumerate(items):
+            if _valid_session_item(item):
+                valid.append((index, item))
+            else:
+                results[index] = {'index': index, 'success': False, 'error': 'Dados inválidos'}
+        
+        # Verificar os estudantes em uma única consulta
+        candidate_ids = {item['student_id'] for _, item in valid}
+        existing_ids = {
+            student_id for (student_id,) in
+            db.session.query(Student.id).filter(Student.id.in_(candidate_ids)).all()
+        } if candidate_ids else set()
+        
+        pending = []
+        for index, item in valid:
+            if item['student_id'] not in existing_ids:
+                results[index] = {'index': index, 'success': False, 'error': 'Estudante não encontrado'}
+                continue
+            try:
+                created_at = datetime.fromisoformat(item['created_at']) if item.get('created_at') else datetime.utcnow()
+            except (TypeError, ValueError):
+                results[index] = {'index': index, 'success': False, 'error': 'Data inválida'}
+                continue
+            
+            session = GameSession(
+                student_id=item['student_id'],
+                game_type=item['game_type'],
+                difficulty_level=item['difficulty_level'],
+                score=item['score'],
+                time_spent=item['time_spent'],
+                completed=item.get('completed', True),
+                created_at=created_at
+            )
+            session.set_session_data(item.get('session_data', {}))
+            pending.append((index, session))
+        
+        # Inserir o lote com os agregados e estados de todos os pares afetados
+        states = _add_sessions([session for _, session in pending])
+        db.session.flush()
+        
+        # Feedback e próxima dificuldade para todos os pares afetados, calculados
+        # antes do commit para não recarregar os objetos expirados
+        sessions = [session for _, session in pending]
+        feedbacks = ai_engine.generate_feedback_batch(sessions)
+        
+        for (index, session), feedback in zip(pending, feedbacks):
+            results[index] = {
+                'index': index,
+                'success': True,
+                'session_id': session.id,
+                'feedback': feedback,
+                'next_difficulty': states[(session.student_id, session.game_type)].next_difficulty
+            }
+        
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'recorded': len(pending),
+            'failed': len(items) - len(pending),
+            'results': results,
+            'message': f'{len(pending)} sessões registradas com sucesso!'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+def _encode_cursor(session):
+    """Cursor opaco com a chave (created_at, id) de uma sessão"""
+    raw = json_codec.dumps([session.created_at.isoformat(), session.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor):
+    created_at, session_id = json_codec.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.fromisoformat(created_at), int(session_id)
+
+def _progress_summary(student_id, game_type=None):
+    """Estatísticas de progresso por jogo a partir do agregado"""
+    progress_by_game = {}
+    for stats in StudentGameStats.for_student(student_id):
+        if game_type and stats.game_type != game_type:
+            continue
+        progress_by_game[stats.game_type] = {
+            'sessions_count': stats.sessions_count,
+            'avg_score': stats.avg_score,
+            'avg_difficulty': stats.avg_difficulty,
+            'total_time': stats.total_time,
+            'completion_rate': stats.completion_rate
+        }
+    return {
+        'progress_by_game': progress_by_game,
+        'total_sessions': sum(game['sessions_count'] for game in progress_by_game.values())
+    }
+
 @ai_bp.route('/student-progress/<int:student_id>', methods=['GET'])
 def get_student_progress(student_id):
     """
     Retorna o progresso detalhado de um estudante.
+    
+    Parâmetros opcionais (query string):
+        limit, cursor: paginação por chave; a resposta traz `next_cursor`
+        game_type: filtra as sessões por tipo de jogo
+        format=ndjson: transmite o resumo e depois as sessões, uma por linha
+        include_session_data=0: omite session_data das sessões (não lê a coluna)
     """
     try:
         # Verificar se o estudante existe
@@ -176,10 +469,16 @@ def get_student_progress(student_id):
         if not student:
             return jsonify({'error': 'Estudante não encontrado'}), 404
         
+        game_type = request.args.get('game_type')
+        
+        if request.args.get('format') == 'ndjson':
+            return _stream_student_progress(student, game_type)
+        
+        if any(arg in request.args for arg in ('limit', 'cursor', 'game_type')):
+            return _paginate_student_progress(student, game_type)
+        
         # Buscar todas as sessões do estudante
-        sessions = GameSession.query.filter_by(student_id=student_id).order_by(
-            GameSession.created_at.desc()
-        ).all()
+        sessions = _load_sessions(GameSession.history_query(student_id))
         
         # Agrupar sessões por tipo de jogo
         progress_by_game = {}
@@ -196,15 +495,15 @@ def get_student_progress(student_id):
             
             progress_by_game[game_type]['sessions'].append(session.to_dict())
         
-        # Calcular estatísticas
-        for game_type, data in progress_by_game.items():
-            game_sessions = [s for s in sessions if s.game_type == game_type]
-            
-            if game_sessions:
-                data['avg_score'] = sum(s.score for s in game_sessions) / len(game_sessions)
-                data['avg_difficulty'] = sum(s.difficulty_level for s in game_sessions) / len(game_sessions)
-                data['total_time'] = sum(s.time_spent for s in game_sessions)
-                data['completion_rate'] = sum(1 for s in game_sessions if s.completed) / len(game_sessions)
+        # Estatísticas a partir do agregado por jogo
+        for stats in StudentGameStats.for_student(student_id):
+            if stats.game_type in progress_by_game:
+                progress_by_game[stats.game_type].update({
+                    'avg_score': stats.avg_score,
+                    'avg_difficulty': stats.avg_difficulty,
+                    'total_time': stats.total_time,
+                    'completion_rate': stats.completion_rate
+                })
         
         # Buscar perfil de aprendizagem
         learning_profile = student.get_learning_profile()
@@ -220,6 +519,64 @@ def get_student_progress(student_id):
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+def _include_session_data():
+    """Parâmetro include_session_data da query string (padrão: incluir)"""
+    return request.args.get('include_session_data', '1').lower() not in ('0', 'false', 'no')
+
+def _load_sessions(query):
+    """
+    Sessões da consulta como GameSession ou, sem session_data, como
+    SessionRecord (a coluna codificada nem é lida do banco)
+    """
+    if _include_session_data():
+        return query.all()
+    return GameSession.records(query)
+
+def _paginate_student_progress(student, game_type):
+    """Uma página de sessões (mais recente primeiro) com o resumo agregado"""
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        cursor = request.args.get('cursor')
+        after = _decode_cursor(cursor) if cursor else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Parâmetros de paginação inválidos'}), 400
+    
+    # Uma sessão a mais indica se existe próxima página
+    sessions = _load_sessions(GameSession.page_query(student.id, game_type, after).limit(limit + 1))
+    has_more = len(sessions) > limit
+    sessions = sessions[:limit]
+    
+    return jsonify({
+        'success': True,
+        'student': student.to_dict(),
+        'learning_profile': student.get_learning_profile(),
+        'summary': _progress_summary(student.id, game_type),
+        'sessions': [session.to_dict() for session in sessions],
+        'next_cursor': _encode_cursor(sessions[-1]) if has_more else None
+    })
+
+def _stream_student_progress(student, game_type):
+    """Transmite o histórico em NDJSON com memória constante"""
+    summary = {
+        'type': 'summary',
+        'student': student.to_dict(),
+        'learning_profile': student.get_learning_profile(),
+        **_progress_summary(student.id, game_type)
+    }
+    query = GameSession.page_query(student.id, game_type)
+    if _include_session_data():
+        sessions = query.yield_per(500)
+    else:
+        sessions = (SessionRecord(*row) for row in
+                    query.with_entities(*GameSession.record_columns()).yield_per(500))
+    
+    def generate():
+        yield json_codec.dumps(summary) + '\n'
+        for session in sessions:
+            yield json_codec.dumps({'type': 'session', **session.to_dict()}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @ai_bp.route('/adaptive-feedback', methods=['POST'])
 def get_adaptive_feedback():
     """
@@ -239,12 +596,9 @@ def get_adaptive_feedback():
         if not student:
             return jsonify({'error': 'Estudante não encontrado'}), 404
         
-        # Buscar sessões recentes
-        query = GameSession.query.filter_by(student_id=student_id)
-        if game_type:
-            query = query.filter_by(game_type=game_type)
-        
-        recent_sessions = query.order_by(GameSession.created_at.desc()).limit(5).all()
+        # Estudante, perfil e sessões recentes carregados uma única vez
+        context = LearningContext.load(student=student)
+        recent_sessions = context.recent_sessions(game_type, limit=5)
         
         if not recent_sessions:
             return jsonify({
@@ -257,10 +611,10 @@ def get_adaptive_feedback():
         
         # Gerar feedback para a sessão mais recente
         latest_session = recent_sessions[0]
-        feedback = ai_engine.generate_feedback(latest_session)
+        feedback = ai_engine.feedback_for(latest_session, context.profile)
         
         # Adicionar recomendações de jogos
-        game_recommendations = ai_engine.recommend_games(student_id, 3)
+        game_recommendations = ai_engine.recommend_games(student_id, 3, context=context)
         
         return jsonify({
             'success': True,
@@ -281,6 +635,9 @@ def get_adaptive_feedback():
 def get_learning_analytics(student_id):
     """
     Retorna análises detalhadas de aprendizagem para um estudante.
+    
+    Com ?source=sessions, recalcula tudo a partir do histórico completo em uma
+    única passada (LearningAnalyticsAccumulator) em vez de usar os agregados.
     """
     try:
         # Verificar se o estudante existe
@@ -288,12 +645,20 @@ def get_learning_analytics(student_id):
         if not student:
             return jsonify({'error': 'Estudante não encontrado'}), 404
         
-        # Buscar todas as sessões
-        sessions = GameSession.query.filter_by(student_id=student_id).order_by(
-            GameSession.created_at.asc()
-        ).all()
+        if request.args.get('source') == 'sessions':
+            steam_prefs = student.get_learning_profile().get('steam_preferences', {})
+            accumulator = LearningAnalyticsAccumulator(ai_engine.game_types, steam_prefs.keys())
+            accumulator.add_all(GameSession.analytics_rows_query(student_id).yield_per(1000))
+            return jsonify({
+                'success': True,
+                'analytics': accumulator.result()
+            })
         
-        if not sessions:
+        # Agregados por tipo de jogo
+        game_stats = StudentGameStats.for_student(student_id)
+        total_sessions = sum(stats.sessions_count for stats in game_stats)
+        
+        if not total_sessions:
             return jsonify({
                 'success': True,
                 'analytics': {
@@ -302,68 +667,51 @@ def get_learning_analytics(student_id):
                 }
             })
         
-        # Análises por período
-        from datetime import datetime, timedelta
+        # Janelas semanal e mensal a partir das sessões dos últimos 30 dias
         now = datetime.utcnow()
-        week_ago = now - timedelta(days=7)
-        month_ago = now - timedelta(days=30)
+        window = LearningAnalyticsAccumulator(ai_engine.game_types, now=now)
+        window.add_all(GameSession.analytics_rows_query(student_id, since=window.month_ago))
+        window_analytics = window.result()
         
-        recent_sessions = [s for s in sessions if s.created_at >= week_ago]
-        monthly_sessions = [s for s in sessions if s.created_at >= month_ago]
+        total_score = sum(stats.score_sum for stats in game_stats)
         
         # Análises de desempenho
         analytics = {
-            'total_sessions': len(sessions),
-            'recent_sessions': len(recent_sessions),
-            'monthly_sessions': len(monthly_sessions),
+            'total_sessions': total_sessions,
+            'recent_sessions': window_analytics.get('recent_sessions', 0),
+            'monthly_sessions': window_analytics.get('monthly_sessions', 0),
             'overall_performance': {
-                'avg_score': sum(s.score for s in sessions) / len(sessions),
-                'avg_difficulty': sum(s.difficulty_level for s in sessions) / len(sessions),
-                'total_time_hours': sum(s.time_spent for s in sessions) / 3600,
-                'completion_rate': sum(1 for s in sessions if s.completed) / len(sessions)
+                'avg_score': total_score / total_sessions,
+                'avg_difficulty': sum(stats.difficulty_sum for stats in game_stats) / total_sessions,
+                'total_time_hours': sum(stats.total_time for stats in game_stats) / 3600,
+                'completion_rate': sum(stats.completed_count for stats in game_stats) / total_sessions
             },
-            'recent_performance': {},
+            'recent_performance': window_analytics.get('recent_performance', {}),
             'game_type_analysis': {},
             'learning_trends': {},
             'steam_engagement': {}
         }
         
-        # Análise de desempenho recente
-        if recent_sessions:
-            analytics['recent_performance'] = {
-                'avg_score': sum(s.score for s in recent_sessions) / len(recent_sessions),
-                'avg_difficulty': sum(s.difficulty_level for s in recent_sessions) / len(recent_sessions),
-                'improvement': 'improving' if len(recent_sessions) > 1 and 
-                              recent_sessions[-1].score > recent_sessions[0].score else 'stable'
-            }
-        
         # Análise por tipo de jogo
-        game_types = set(s.game_type for s in sessions)
-        for game_type in game_types:
-            game_sessions = [s for s in sessions if s.game_type == game_type]
-            analytics['game_type_analysis'][game_type] = {
-                'sessions_count': len(game_sessions),
-                'avg_score': sum(s.score for s in game_sessions) / len(game_sessions),
-                'avg_difficulty': sum(s.difficulty_level for s in game_sessions) / len(game_sessions),
-                'total_time': sum(s.time_spent for s in game_sessions),
-                'last_played': max(s.created_at for s in game_sessions).isoformat()
+        for stats in game_stats:
+            analytics['game_type_analysis'][stats.game_type] = {
+                'sessions_count': stats.sessions_count,
+                'avg_score': stats.avg_score,
+                'avg_difficulty': stats.avg_difficulty,
+                'total_time': stats.total_time,
+                'last_played': stats.last_played.isoformat()
             }
         
         # Tendências de aprendizagem
-        if len(sessions) >= 5:
+        if total_sessions >= 5:
             # Dividir sessões em grupos para análise de tendência
-            mid_point = len(sessions) // 2
-            early_sessions = sessions[:mid_point]
-            later_sessions = sessions[mid_point:]
+            mid_point = total_sessions // 2
+            early_total = GameSession.first_scores_sum(student_id, mid_point)
             
-            early_avg = sum(s.score for s in early_sessions) / len(early_sessions)
-            later_avg = sum(s.score for s in later_sessions) / len(later_sessions)
+            early_avg = early_total / mid_point
+            later_avg = (total_score - early_total) / (total_sessions - mid_point)
             
-            analytics['learning_trends'] = {
-                'score_improvement': later_avg - early_avg,
-                'trend': 'improving' if later_avg > early_avg else 'declining' if later_avg < early_avg else 'stable',
-                'consistency': 'high' if abs(later_avg - early_avg) < 0.1 else 'moderate' if abs(later_avg - early_avg) < 0.3 else 'variable'
-            }
+            analytics['learning_trends'] = trend_from_averages(early_avg, later_avg)
         
         # Análise de engajamento STEAM
         profile = student.get_learning_profile()
@@ -373,21 +721,19 @@ def get_learning_analytics(student_id):
             # Mapear tipos de jogos para elementos STEAM
             steam_mapping = ai_engine.game_types
             steam_engagement = {element: 0 for element in steam_prefs.keys()}
+            relevant_counts = {element: 0 for element in steam_prefs.keys()}
             
-            for session in sessions:
-                game_info = steam_mapping.get(session.game_type, {})
-                steam_elements = game_info.get('steam_elements', [])
-                
-                for element in steam_elements:
+            for stats in game_stats:
+                game_info = steam_mapping.get(stats.game_type, {})
+                for element in game_info.get('steam_elements', []):
                     if element in steam_engagement:
-                        steam_engagement[element] += session.score
+                        steam_engagement[element] += stats.score_sum
+                        relevant_counts[element] += stats.sessions_count
             
             # Normalizar por número de sessões
-            for element in steam_engagement:
-                relevant_sessions = [s for s in sessions 
-                                   if element in steam_mapping.get(s.game_type, {}).get('steam_elements', [])]
-                if relevant_sessions:
-                    steam_engagement[element] /= len(relevant_sessions)
+            for element, count in relevant_counts.items():
+                if count:
+                    steam_engagement[element] /= count
             
             analytics['steam_engagement'] = steam_engagement
         
@@ -399,3 +745,170 @@ def get_learning_analytics(student_id):
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+@ai_bp.route('/class-analytics', methods=['GET'])
+def get_class_analytics():
+    """
+    Retorna o resumo por estudante e por jogo de uma turma (?grade_level=...).
+    """
+    try:
+        grade_level = request.args.get('grade_level')
+        if not grade_level:
+            return jsonify({'error': 'Dados inválidos'}), 400
+        
+        students = student_summaries(grade_level)
+        if not students:
+            return jsonify({'error': 'Turma não encontrada'}), 404
+        
+        return jsonify({
+            'success': True,
+            'grade_level': grade_level,
+            'students_count': len(students),
+            'students': students,
+            'games': game_summaries(grade_level)
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+@ai_bp.route('/school-analytics', methods=['GET'])
+def get_school_analytics():
+    """
+    Retorna o resumo por série e por jogo de toda a escola.
+    """
+    try:
+        grades = grade_summaries()
+        
+        return jsonify({
+            'success': True,
+            'students_count': sum(grade['students_count'] for grade in grades.values()),
+            'grades': grades,
+            'games': game_summaries()
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+@ai_bp.route('/content-search', methods=['GET'])
+def search_content():
+    """
+    Busca trechos dos livros didáticos por tema.
+    
+    Parâmetros (query string):
+        q: termos e/ou frases entre aspas
+        subject: filtra pela disciplina dos livros (ex.: "math", "science")
+        limit: número de páginas retornadas (padrão 10, máximo 50)
+    """
+    if content_index is None:
+        return jsonify({'error': 'Índice de conteúdo não configurado'}), 503
+    
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Parâmetro q é obrigatório'}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        return jsonify({'error': 'Parâmetro limit inválido'}), 400
+    
+    try:
+        results = content_index.search(query, limit=limit, subject=request.args.get('subject'))
+        return jsonify({
+            'success': True,
+            'query': query,
+            'results': results
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+@ai_bp.route('/questions', methods=['POST'])
+def draw_questions():
+    """
+    Sorteia questões do banco para um tipo de jogo. Sem `difficulty`, usa a
+    próxima dificuldade recomendada para o estudante (`student_id`).
+    """
+    try:
+        data = request.get_json()
+        
+        if not isinstance(data, dict) or 'game_type' not in data or ('difficulty' not in data and 'student_id' not in data):
+            return jsonify({'error': 'Dados inválidos'}), 400
+        if question_bank is None:
+            return jsonify({'error': 'Banco de questões não configurado'}), 503
+        
+        game_type = data['game_type']
+        difficulty = data.get('difficulty')
+        count = data.get('count', 5)
+        if (not isinstance(game_type, str)
+                or not _is_int(count)
+                or (difficulty is None and not _is_int(data.get('student_id')))
+                or (difficulty is not None and not _is_number(difficulty))):
+            return jsonify({'error': 'Dados inválidos'}), 400
+        
+        if difficulty is None:
+            if not Student.query.get(data['student_id']):
+                return jsonify({'error': 'Estudante não encontrado'}), 404
+            difficulty = ai_engine.calculate_next_difficulty(data['student_id'], game_type)
+        count = min(max(count, 1), 50)
+        
+        return jsonify({
+            'success': True,
+            'game_type': game_type,
+            'difficulty': difficulty,
+            'questions': question_bank.sample(game_type, float(difficulty), count)
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+@ai_bp.route('/import-roster', methods=['POST'])
+def import_roster_upload():
+    """
+    Importa em massa estudantes e quizzes iniciais de um CSV ou JSONL enviado
+    no campo `file`. A resposta é NDJSON com o progresso após cada lote. O
+    arquivo é guardado pelo hash do conteúdo: reenviar o mesmo arquivo depois
+    de uma interrupção continua a importação do último lote gravado.
+    """
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'error': 'Envie o arquivo no campo "file"'}), 400
+    extension = os.path.splitext(upload.filename)[1].lower()
+    if extension not in ('.csv', '.jsonl'):
+        return jsonify({'error': 'Formato não suportado (use .csv ou .jsonl)'}), 400
+    
+    import_dir = current_app.config['ROSTER_IMPORT_DIR']
+    os.makedirs(import_dir, exist_ok=True)
+    partial = os.path.join(import_dir, f'upload-{os.getpid()}-{id(upload)}.tmp')
+    digest = hashlib.sha256()
+    with open(partial, 'wb') as target:
+        for chunk in iter(lambda: upload.stream.read(1024 * 1024), b''):
+            digest.update(chunk)
+            target.write(chunk)
+    path = os.path.join(import_dir, digest.hexdigest() + extension)
+    os.replace(partial, path)
+    
+    try:
+        batch_size = min(max(int(request.form.get('batch_size', 500)), 1), 5000)
+    except ValueError:
+        return jsonify({'error': 'Parâmetro batch_size inválido'}), 400
+    workers = current_app.config.get('ROSTER_IMPORT_WORKERS')
+    
+    def generate():
+        try:
+            for report in import_roster(path, batch_size=batch_size, workers=workers):
+                yield json_codec.dumps({'type': 'progress', **report}) + '\n'
+        except Exception as e:
+            yield json_codec.dumps({'type': 'error', 'error': f'Erro interno: {str(e)}'}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@ai_bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """
+    Retorna os contadores dos caches em memória (para dimensionamento).
+    """
+    return jsonify({
+        'success': True,
+        'profile_cache': profile_cache.stats(),
+        'result_cache': ai_engine.result_cache.stats() if ai_engine.result_cache else None,
+        'write_behind': write_behind.stats() if write_behind else None
+    })
+
@@ -0,0 +1,236 @@
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List
+
+from src.models.student import db, Student, StudentGameStats
+
+
+class LearningAnalyticsAccumulator:
+    """
+    Calcula todas as métricas de /learning-analytics em uma única passada sobre
+    as sessões de um estudante, recebidas em ordem cronológica (mais antiga
+    primeiro). Aceita objetos GameSession ou qualquer linha com os atributos
+    game_type, score, difficulty_level, time_spent, completed e created_at.
+
+    As pontuações são guardadas em arrays compactos e somadas com sum() no
+    final, o mesmo algoritmo de soma usado pelo endpoint original, para que o
+    resultado seja idêntico.
+
+    Exemplo:
+        accumulator = LearningAnalyticsAccumulator(ai_engine.game_types, steam_prefs)
+        accumulator.add_all(sessions)
+        analytics = accumulator.result()
+    """
+
+    def __init__(self, game_types: Dict[str, Dict], steam_elements: Iterable[str] = (),
+                 now: datetime = None):
+        now = now or datetime.utcnow()
+        self.week_ago = now - timedelta(days=7)
+        self.month_ago = now - timedelta(days=30)
+
+        # Elementos STEAM de cada tipo de jogo que interessam ao perfil
+        self.steam_elements = list(steam_elements)
+        self._steam_by_game = {
+            game_type: [e for e in info.get('steam_elements', []) if e in self.steam_elements]
+            for game_type, info in game_types.items()
+        }
+
+        self.count = 0
+        self.difficulty_sum = 0
+        self.time_sum = 0
+        self.completed_count = 0
+        self.scores = array('d')
+
+        self.monthly_count = 0
+        self.recent_scores = array('d')
+        self.recent_difficulty_sum = 0
+        self.recent_first_score = None
+        self.recent_last_score = None
+
+        # tipo de jogo -> [pontuações, soma de dificuldade, tempo, última data]
+        self.games = {}
+        self.steam_sums = {element: 0 for element in self.steam_elements}
+        self.steam_counts = {element: 0 for element in self.steam_elements}
+
+    def add(self, session) -> None:
+        """Acumula uma sessão"""
+        score = session.score
+        created_at = session.created_at
+
+        self.count += 1
+        self.difficulty_sum += session.difficulty_level
+        self.time_sum += session.time_spent
+        if session.completed:
+            self.completed_count += 1
+        self.scores.append(score)
+
+        if created_at >= self.month_ago:
+            self.monthly_count += 1
+        if created_at >= self.week_ago:
+            self.recent_scores.append(score)
+            self.recent_difficulty_sum += session.difficulty_level
+            if self.recent_first_score is None:
+                self.recent_first_score = score
+            self.recent_last_score = score
+
+        game = self.games.get(session.game_type)
+        if game is None:
+            game = self.games[session.game_type] = [array('d'), 0, 0, created_at]
+        game[0].append(score)
+        game[1] += session.difficulty_level
+        game[2] += session.time_spent
+        if created_at > game[3]:
+            game[3] = created_at
+
+        for element in self._steam_by_game.get(session.game_type, ()):
+            self.steam_sums[element] += score
+            self.steam_counts[element] += 1
+
+    def add_all(self, sessions: Iterable) -> 'LearningAnalyticsAccumulator':
+        for session in sessions:
+            self.add(session)
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        """Monta o dicionário de análises no mesmo formato do endpoint"""
+        if not self.count:
+            return {
+                'message': 'Nenhuma sessão encontrada para análise',
+                'total_sessions': 0
+            }
+
+        analytics = {
+            'total_sessions': self.count,
+            'recent_sessions': len(self.recent_scores),
+            'monthly_sessions': self.monthly_count,
+            'overall_performance': {
+                'avg_score': sum(self.scores) / self.count,
+                'avg_difficulty': self.difficulty_sum / self.count,
+                'total_time_hours': self.time_sum / 3600,
+                'completion_rate': self.completed_count / self.count
+            },
+            'recent_performance': {},
+            'game_type_analysis': {},
+            'learning_trends': {},
+            'steam_engagement': {}
+        }
+
+        recent_count = len(self.recent_scores)
+        if recent_count:
+            analytics['recent_performance'] = {
+                'avg_score': sum(self.recent_scores) / recent_count,
+                'avg_difficulty': self.recent_difficulty_sum / recent_count,
+                'improvement': 'improving' if recent_count > 1 and
+                              self.recent_last_score > self.recent_first_score else 'stable'
+            }
+
+        for game_type, (scores, difficulty_sum, time_sum, last_played) in self.games.items():
+            analytics['game_type_analysis'][game_type] = {
+                'sessions_count': len(scores),
+                'avg_score': sum(scores) / len(scores),
+                'avg_difficulty': difficulty_sum / len(scores),
+                'total_time': time_sum,
+                'last_played': last_played.isoformat()
+            }
+
+        if self.count >= 5:
+            analytics['learning_trends'] = learning_trends(self.scores)
+
+        if self.steam_elements:
+            analytics['steam_engagement'] = {
+                element: self.steam_sums[element] / self.steam_counts[element]
+                if self.steam_counts[element] else self.steam_sums[element]
+                for element in self.steam_elements
+            }
+
+        return analytics
+
+
+def learning_trends(scores: List[float]) -> Dict[str, Any]:
+    """Compara a média da primeira e da segunda metade das pontuações (em ordem cronológica)"""
+    mid_point = len(scores) // 2
+    early_avg = sum(scores[:mid_point]) / mid_point
+    later_avg = sum(scores[mid_point:]) / (len(scores) - mid_point)
+    return trend_from_averages(early_avg, later_avg)
+
+
+def trend_from_averages(early_avg: float, later_avg: float) -> Dict[str, Any]:
+    return {
+        'score_improvement': later_avg - early_avg,
+        'trend': 'improving' if later_avg > early_avg else 'declining' if later_avg < early_avg else 'stable',
+        'consistency': 'high' if abs(later_avg - early_avg) < 0.1 else 'moderate' if abs(later_avg - early_avg) < 0.3 else 'variable'
+    }
+
+
+def _aggregate_columns():
+    """Colunas agregadas (GROUP BY) sobre student_game_stats"""
+    return (
+        db.func.coalesce(db.func.sum(StudentGameStats.sessions_count), 0).label('sessions_count'),
+        db.func.coalesce(db.func.sum(StudentGameStats.score_sum), 0.0).label('score_sum'),
+        db.func.coalesce(db.func.sum(StudentGameStats.difficulty_sum), 0).label('difficulty_sum'),
+        db.func.coalesce(db.func.sum(StudentGameStats.total_time), 0).label('total_time'),
+        db.func.coalesce(db.func.sum(StudentGameStats.completed_count), 0).label('completed_count'),
+        db.func.max(StudentGameStats.last_played).label('last_played')
+    )
+
+
+def _summary(row) -> Dict[str, Any]:
+    count = row.sessions_count
+    return {
+        'sessions_count': count,
+        'avg_score': row.score_sum / count if count else 0,
+        'avg_difficulty': row.difficulty_sum / count if count else 0,
+        'total_time': row.total_time,
+        'completion_rate': row.completed_count / count if count else 0,
+        'last_played': row.last_played.isoformat() if row.last_played else None
+    }
+
+
+def game_summaries(grade_level: str = None) -> Dict[str, Dict[str, Any]]:
+    """Resumo por tipo de jogo de uma turma (ou da escola) em uma consulta"""
+    query = db.session.query(
+        StudentGameStats.game_type,
+        db.func.count(StudentGameStats.student_id).label('students_count'),
+        *_aggregate_columns()
+    )
+    if grade_level:
+        query = query.join(Student, Student.id == StudentGameStats.student_id).filter(
+            Student.grade_level == grade_level
+        )
+
+    return {
+        row.game_type: {'students_count': row.students_count, **_summary(row)}
+        for row in query.group_by(StudentGameStats.game_type).all()
+    }
+
+
+def student_summaries(grade_level: str) -> List[Dict[str, Any]]:
+    """Resumo por estudante de uma turma em uma consulta (inclui quem não jogou)"""
+    rows = db.session.query(
+        Student.id, Student.name, *_aggregate_columns()
+    ).outerjoin(
+        StudentGameStats, StudentGameStats.student_id == Student.id
+    ).filter(
+        Student.grade_level == grade_level
+    ).group_by(Student.id, Student.name).order_by(Student.name).all()
+
+    return [
+        {'student_id': row.id, 'name': row.name, **_summary(row)}
+        for row in rows
+    ]
+
+
+def grade_summaries() -> Dict[str, Dict[str, Any]]:
+    """Resumo por série de toda a escola em uma consulta"""
+    rows = db.session.query(
+        Student.grade_level,
+        db.func.count(db.distinct(Student.id)).label('students_count'),
+        *_aggregate_columns()
+    ).outerjoin(
+        StudentGameStats, StudentGameStats.student_id == Student.id
+    ).group_by(Student.grade_level).all()
+
+    return {
+        row.grade_level: {'students_count': row.students_count, **_summary(row)}
+        for row in rows
+    }
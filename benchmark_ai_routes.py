@@ -0,0 +1,324 @@
+"""
+Benchmark de ponta a ponta dos endpoints de /api/ai.
+
+Cria um banco sintético na escala pedida, chama cada endpoint pelo cliente de
+teste do Flask e grava latência (p50/p95/p99), vazão e consultas SQL por
+requisição em um arquivo JSON. Com --baseline, compara com uma execução
+anterior e termina com código 1 se algum endpoint piorar além do limite.
+
+Uso:
+    python -m src.benchmark_ai_routes --students 10000 --sessions 200 \\
+        --output bench.json --baseline bench_anterior.json
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import event
+
+from src.models.student import db, Student, GameSession, rebuild_game_stats, migrate_indexes
+from src.routes import ai_routes
+from src.routes.ai_routes import ai_bp, ai_engine
+from src.storage import configure_sqlite_storage
+from src.question_bank import build_question_bank
+from src import json_codec
+
+LEARNING_PREFERENCES = ['visual', 'audio', 'hands_on', 'reading']
+CHALLENGE_PREFERENCES = ['easy', 'medium', 'hard']
+ACTIVITIES = ['research', 'explore', 'collaborate', 'build', 'analyze', 'create']
+# Tamanhos de lote de /record-sessions medidos (o número de consultas não deve mudar)
+RECORD_BATCH_SIZES = (5, 20)
+ROSTER_ROWS = 20
+CONTENT_WORDS = (
+    'energia fração número soma robô lógica sistema solar matéria célula água planeta '
+    'força movimento circuito sensor algoritmo leitura texto poema verbo história mapa'
+).split()
+CONTENT_QUERIES = ['energia', 'fração número', '"sistema solar"', 'robô "circuito sensor"']
+
+
+def create_app(database_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{database_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    directory = os.path.dirname(database_path)
+    app.config['CONTENT_INDEX_PATH'] = os.path.join(directory, 'content_index.db')
+    app.config['QUESTION_BANK_PATH'] = os.path.join(directory, 'question_bank.bin')
+    app.config['ROSTER_IMPORT_DIR'] = os.path.join(directory, 'imports')
+    app.config['ROSTER_IMPORT_WORKERS'] = 1
+    json_codec.init_app(app)
+    configure_sqlite_storage(app)
+    app.register_blueprint(ai_bp, url_prefix='/api/ai')
+    db.init_app(app)
+    return app
+
+
+def random_quiz_answers(rng):
+    return {
+        'learning_preference': rng.choice(LEARNING_PREFERENCES),
+        'favorite_activities': rng.sample(['drawing', 'music', 'sports', 'reading', 'building'], 2),
+        'preferred_activities': rng.sample(ACTIVITIES, 3),
+        'challenge_preference': rng.choice(CHALLENGE_PREFERENCES),
+        'subject_preferences': rng.sample(list(ai_engine.game_types), 2),
+        'career_interests': [rng.choice(['engineer', 'artist', 'programmer', 'teacher', 'scientist'])],
+        'motivation_sources': ['points']
+    }
+
+
+def seed_database(num_students, sessions_per_student, grades, rng, chunk_size=20000):
+    """Popula estudantes, sessões e os agregados derivados"""
+    now = datetime.utcnow()
+    game_types = list(ai_engine.game_types)
+
+    students = []
+    for i in range(num_students):
+        student = Student(
+            name=f'Estudante {i}',
+            email=f'estudante{i}@bench.local',
+            grade_level=f'{6 + i % grades}º ano'
+        )
+        student.set_learning_profile(ai_engine.analyze_learning_profile(random_quiz_answers(rng)))
+        students.append(student)
+    db.session.add_all(students)
+    db.session.commit()
+
+    rows = []
+    for student in students:
+        for _ in range(sessions_per_student):
+            rows.append({
+                'student_id': student.id,
+                'game_type': rng.choice(game_types),
+                'difficulty_level': rng.randint(1, 10),
+                'score': round(rng.random(), 3),
+                'time_spent': rng.randint(30, 600),
+                'completed': rng.random() > 0.2,
+                'session_data': '{}',
+                'created_at': now - timedelta(minutes=rng.randint(0, 60 * 24 * 180))
+            })
+            if len(rows) >= chunk_size:
+                db.session.execute(GameSession.__table__.insert(), rows)
+                rows = []
+    if rows:
+        db.session.execute(GameSession.__table__.insert(), rows)
+    db.session.commit()
+
+    rebuild_game_stats()
+    ai_engine.rebuild_difficulty_states()
+    return [student.id for student in students]
+
+
+def seed_content(app, rng, books=3, pages_per_book=100, questions_per_bucket=5):
+    """Cria o índice de conteúdo e o banco de questões sintéticos e os ativa no blueprint"""
+    index = ai_routes.configure_content_index(app)
+    for book in range(books):
+        pages = [
+            (page, ' '.join(rng.choice(CONTENT_WORDS) for _ in range(300)))
+            for page in range(1, pages_per_book + 1)
+        ]
+        index.add_book(f'benchmark-{book}', f'/benchmark/livro-{book}.pdf', pages, subject='science')
+
+    build_question_bank((
+        {'game_type': game_type, 'difficulty': difficulty, 'text': f'{game_type} {difficulty}.{i}'}
+        for game_type in ai_engine.game_types
+        for difficulty in range(1, 11)
+        for i in range(questions_per_bucket)
+    ), app.config['QUESTION_BANK_PATH'])
+    ai_routes.configure_question_bank(app)
+
+
+def roster_upload(rng, rows=ROSTER_ROWS):
+    """Formulário de /import-roster com um CSV de e-mails novos (metade com quiz)"""
+    batch = rng.getrandbits(64)
+    lines = ['name,email,grade_level,quiz_answers']
+    for i in range(rows):
+        answers = json.dumps(random_quiz_answers(rng)) if i % 2 else ''
+        lines.append(','.join([
+            f'Importado {i}', f'importado{batch}-{i}@bench.local', '7º ano',
+            '"' + answers.replace('"', '""') + '"'
+        ]))
+    return {'file': (io.BytesIO('\n'.join(lines).encode('utf-8')), 'roster.csv')}
+
+
+def endpoint_requests(rng, student_ids, grades):
+    """
+    Gera (método, url, corpo[, formulário]) para cada endpoint do blueprint.
+    /record-sessions é medido com cada tamanho de RECORD_BATCH_SIZES.
+    """
+    game_types = list(ai_engine.game_types)
+
+    def student():
+        return rng.choice(student_ids)
+
+    def record_sessions(batch_size):
+        return lambda: ('POST', '/api/ai/record-sessions', {'sessions': [
+            {'student_id': student(), 'game_type': rng.choice(game_types),
+             'difficulty_level': rng.randint(1, 10), 'score': rng.random(),
+             'time_spent': rng.randint(30, 600)} for _ in range(batch_size)]})
+
+    return {
+        'analyze-quiz': lambda: ('POST', '/api/ai/analyze-quiz', {
+            'student_id': student(), 'quiz_answers': random_quiz_answers(rng)}),
+        'recommend-difficulty': lambda: ('POST', '/api/ai/recommend-difficulty', {
+            'student_id': student(), 'game_type': rng.choice(game_types)}),
+        'recommend-games': lambda: ('POST', '/api/ai/recommend-games', {
+            'student_id': student()}),
+        'record-session': lambda: ('POST', '/api/ai/record-session', {
+            'student_id': student(), 'game_type': rng.choice(game_types),
+            'difficulty_level': rng.randint(1, 10), 'score': rng.random(),
+            'time_spent': rng.randint(30, 600)}),
+        **{f'record-sessions-{size}': record_sessions(size) for size in RECORD_BATCH_SIZES},
+        'student-progress': lambda: ('GET', f'/api/ai/student-progress/{student()}', None),
+        'student-progress-page': lambda: ('GET', f'/api/ai/student-progress/{student()}?limit=50', None),
+        'adaptive-feedback': lambda: ('POST', '/api/ai/adaptive-feedback', {
+            'student_id': student()}),
+        'learning-analytics': lambda: ('GET', f'/api/ai/learning-analytics/{student()}', None),
+        'learning-analytics-sessions': lambda: (
+            'GET', f'/api/ai/learning-analytics/{student()}?source=sessions', None),
+        'cohort-difficulty': lambda: ('POST', '/api/ai/cohort-difficulty', {
+            'grade_level': f'{6 + rng.randrange(grades)}º ano'}),
+        'class-analytics': lambda: (
+            'GET', f'/api/ai/class-analytics?grade_level={6 + rng.randrange(grades)}º ano', None),
+        'school-analytics': lambda: ('GET', '/api/ai/school-analytics', None),
+        'content-search': lambda: (
+            'GET', f'/api/ai/content-search?q={rng.choice(CONTENT_QUERIES)}&limit=5', None),
+        'questions': lambda: ('POST', '/api/ai/questions', {
+            'student_id': student(), 'game_type': rng.choice(game_types), 'count': 5}),
+        'import-roster': lambda: ('POST', '/api/ai/import-roster', None, roster_upload(rng)),
+        'cache-stats': lambda: ('GET', '/api/ai/cache-stats', None),
+    }
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_benchmark(app, requests_per_endpoint, rng, student_ids, grades, only=None):
+    """Executa as requisições e retorna as métricas por endpoint"""
+    query_counter = {'count': 0}
+
+    with app.app_context():
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def count_queries(*args):
+            query_counter['count'] += 1
+
+    if ai_routes.content_index is not None:
+        ai_routes.content_index.trace = count_queries
+
+    client = app.test_client()
+    results = {}
+    for name, make_request in endpoint_requests(rng, student_ids, grades).items():
+        if only and name not in only:
+            continue
+
+        latencies, queries, errors = [], [], 0
+        started = time.perf_counter()
+        for _ in range(requests_per_endpoint):
+            method, url, body, *form = make_request()
+            query_counter['count'] = 0
+            start = time.perf_counter()
+            response = client.open(url, method=method, json=body, data=form[0] if form else None)
+            response.get_data()  # respostas em streaming executam as consultas durante a leitura
+            latencies.append(time.perf_counter() - start)
+            queries.append(query_counter['count'])
+            if response.status_code >= 400:
+                errors += 1
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        results[name] = {
+            'requests': requests_per_endpoint,
+            'errors': errors,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'throughput_rps': requests_per_endpoint / elapsed if elapsed else 0.0,
+            'queries_per_request': sum(queries) / len(queries),
+            'max_queries': max(queries)
+        }
+        print(f"{name:30s} p50={results[name]['p50_ms']:8.2f}ms "
+              f"p95={results[name]['p95_ms']:8.2f}ms p99={results[name]['p99_ms']:8.2f}ms "
+              f"rps={results[name]['throughput_rps']:8.1f} "
+              f"queries={results[name]['queries_per_request']:.1f}")
+    return results
+
+
+def find_regressions(results, baseline, threshold):
+    """Endpoints cuja p95 ou consultas por requisição pioraram além do limite"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if not previous:
+            continue
+        for metric in ('p95_ms', 'queries_per_request'):
+            if previous[metric] and current[metric] > previous[metric] * (1 + threshold):
+                regressions.append((name, metric, previous[metric], current[metric]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--sessions', type=int, default=50, help='sessões por estudante')
+    parser.add_argument('--grades', type=int, default=4, help='número de séries/turmas')
+    parser.add_argument('--requests', type=int, default=200, help='requisições por endpoint')
+    parser.add_argument('--database', help='arquivo SQLite (reutilizado se já existir)')
+    parser.add_argument('--endpoint', action='append', help='mede apenas estes endpoints')
+    parser.add_argument('--output', default='bench_output.json')
+    parser.add_argument('--baseline', help='JSON de uma execução anterior para comparação')
+    parser.add_argument('--threshold', type=float, default=0.2, help='piora tolerada (0.2 = 20%%)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    database_path = args.database or os.path.join(tempfile.mkdtemp(), 'bench.db')
+    reuse = os.path.exists(database_path)
+    app = create_app(database_path)
+
+    with app.app_context():
+        db.create_all()
+        migrate_indexes(db.engine)
+        if reuse:
+            student_ids = [student_id for (student_id,) in db.session.query(Student.id).all()]
+        else:
+            started = time.perf_counter()
+            student_ids = seed_database(args.students, args.sessions, args.grades, rng)
+            print(f'Banco populado em {time.perf_counter() - started:.1f}s: {database_path}')
+    seed_content(app, rng)
+
+    results = run_benchmark(app, args.requests, rng, student_ids, args.grades, args.endpoint)
+
+    report = {
+        'created_at': datetime.utcnow().isoformat(),
+        'scale': {
+            'students': len(student_ids),
+            'sessions_per_student': args.sessions,
+            'grades': args.grades,
+            'requests_per_endpoint': args.requests
+        },
+        'endpoints': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as output:
+        json.dump(report, output, indent=2)
+    print(f'Resultados gravados em {args.output}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            regressions = find_regressions(results, json.load(baseline_file), args.threshold)
+        for name, metric, previous, current in regressions:
+            print(f'REGRESSÃO {name}: {metric} {previous:.2f} -> {current:.2f}')
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
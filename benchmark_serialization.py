@@ -0,0 +1,109 @@
+"""
+Microbenchmark de serialização JSON: compara o módulo json da biblioteca
+padrão com src.json_codec (orjson quando instalado) em cargas no formato das
+respostas de /student-progress e /learning-analytics.
+
+Uso:
+    python -m src.benchmark_serialization --sessions 5000 --repeat 20
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from src import json_codec
+
+GAME_TYPES = ['math_adventure', 'logic_puzzle', 'robotics_sim', 'science_lab', 'art_creator']
+
+
+def progress_payload(sessions, rng):
+    """Carga semelhante a /student-progress: muitas sessões com session_data"""
+    now = datetime.utcnow()
+    return {
+        'success': True,
+        'student': {'id': 1, 'name': 'Estudante', 'grade_level': '7º ano', 'created_at': now},
+        'sessions': [
+            {
+                'id': i,
+                'student_id': 1,
+                'game_type': rng.choice(GAME_TYPES),
+                'difficulty_level': rng.randint(1, 10),
+                'score': rng.random(),
+                'time_spent': rng.randint(30, 600),
+                'completed': rng.random() > 0.2,
+                'session_data': {'hints_used': rng.randint(0, 5), 'answers': [rng.randint(0, 3) for _ in range(10)]},
+                'created_at': now - timedelta(minutes=i)
+            }
+            for i in range(sessions)
+        ]
+    }
+
+
+def analytics_payload(rng):
+    """Carga semelhante a /learning-analytics, com escalares do NumPy vindos do motor"""
+    return {
+        'success': True,
+        'analytics': {
+            game_type: {
+                'avg_score': np.float64(rng.random()),
+                'avg_difficulty': np.float64(rng.uniform(1, 10)),
+                'sessions': np.int64(rng.randint(1, 500)),
+                'trend': np.array([rng.random() for _ in range(30)])
+            }
+            for game_type in GAME_TYPES
+        }
+    }
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, default=json_codec.default).encode('utf-8')
+
+
+def measure(func, payload, repeat):
+    """Melhor tempo (segundos) de `repeat` execuções"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(payload)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=5000, help='sessões na carga de progresso')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    payloads = {
+        'student-progress': progress_payload(args.sessions, rng),
+        'learning-analytics': analytics_payload(rng)
+    }
+
+    print(f'Backend do codec: {json_codec.BACKEND}')
+    for name, payload in payloads.items():
+        encoded = json_codec.dumps_bytes(payload)
+        if json.loads(encoded) != json.loads(_stdlib_dumps(payload)):
+            print(f'{name}: saída diferente da biblioteca padrão')
+            return 1
+
+        stdlib_dump = measure(_stdlib_dumps, payload, args.repeat)
+        codec_dump = measure(json_codec.dumps_bytes, payload, args.repeat)
+        stdlib_load = measure(json.loads, encoded, args.repeat)
+        codec_load = measure(json_codec.loads, encoded, args.repeat)
+        print(f'{name:20s} {len(encoded) / 1024:9.1f} KiB  '
+              f'dumps: json={stdlib_dump * 1000:8.2f}ms codec={codec_dump * 1000:8.2f}ms '
+              f'({stdlib_dump / codec_dump:4.1f}x)  '
+              f'loads: json={stdlib_load * 1000:8.2f}ms codec={codec_load * 1000:8.2f}ms '
+              f'({stdlib_load / codec_load:4.1f}x)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
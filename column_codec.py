@@ -0,0 +1,113 @@
+"""
+Codificação das colunas JSON dos modelos (session_data, answers, results).
+
+Valores em JSON continuam gravados como texto, então bancos antigos seguem
+legíveis. Os formatos binários são gravados como BLOB com um byte de prefixo
+que identifica o formato, e a leitura detecta o formato de cada valor:
+
+    texto      JSON
+    b'M' + ... MessagePack
+    b'Z' + ... MessagePack comprimido com zlib
+    b'J' + ... JSON comprimido com zlib
+"""
+import zlib
+
+from src import json_codec
+
+try:
+    import msgpack
+except ImportError:  # dependência opcional
+    msgpack = None
+
+_settings = {'codec': 'json', 'compress_threshold': None}
+_CONFIGURED = object()
+
+
+def configure(codec='json', compress_threshold=None):
+    """
+    Define o formato usado nas próximas gravações.
+
+    Args:
+        codec: 'json' ou 'msgpack'
+        compress_threshold: comprime com zlib valores codificados maiores que
+            este número de bytes (None desativa)
+    """
+    if codec not in ('json', 'msgpack'):
+        raise ValueError(f'Codec desconhecido: {codec}')
+    if codec == 'msgpack':
+        _require_msgpack()
+    _settings['codec'] = codec
+    _settings['compress_threshold'] = compress_threshold
+
+
+def encode(value, codec=None, compress_threshold=_CONFIGURED):
+    """
+    Codifica um valor para gravação na coluna.
+
+    Sem `codec`/`compress_threshold`, usa o que foi definido em configure();
+    compress_threshold=None grava sem compressão.
+    """
+    codec = codec or _settings['codec']
+    threshold = _settings['compress_threshold'] if compress_threshold is _CONFIGURED else compress_threshold
+
+    if codec == 'msgpack':
+        _require_msgpack()
+        packed = msgpack.packb(value, use_bin_type=True)
+        if threshold is not None and len(packed) > threshold:
+            return b'Z' + zlib.compress(packed)
+        return b'M' + packed
+
+    text = json_codec.dumps(value)
+    if threshold is not None and len(text) > threshold:
+        return b'J' + zlib.compress(text.encode('utf-8'))
+    return text
+
+
+def decode(raw):
+    """Decodifica um valor lido da coluna, em qualquer um dos formatos"""
+    if raw is None:
+        return None
+    if isinstance(raw, str):
+        return json_codec.loads(raw)
+
+    raw = bytes(raw)
+    prefix, payload = raw[:1], raw[1:]
+    if prefix == b'M':
+        return _unpack(payload)
+    if prefix == b'Z':
+        return _unpack(zlib.decompress(payload))
+    if prefix == b'J':
+        return json_codec.loads(zlib.decompress(payload))
+    return json_codec.loads(raw)
+
+
+def _require_msgpack():
+    if msgpack is None:
+        raise RuntimeError('O formato MessagePack requer o pacote "msgpack" instalado')
+
+
+def _unpack(payload):
+    _require_msgpack()
+    return msgpack.unpackb(payload, raw=False)
+
+
+class LazyColumns:
+    """
+    Mixin para modelos com colunas codificadas: decodifica cada coluna só no
+    primeiro acesso e reaproveita o valor enquanto o conteúdo bruto não mudar.
+    """
+
+    def _decoded(self, column):
+        raw = getattr(self, column)
+        cache = self.__dict__.setdefault('_decoded_columns', {})
+        cached = cache.get(column)
+        if cached is not None and cached[0] is raw:
+            return cached[1]
+        value = decode(raw)
+        cache[column] = (raw, value)
+        return value
+
+    def _encode(self, column, value):
+        raw = encode(value)
+        setattr(self, column, raw)
+        self.__dict__.setdefault('_decoded_columns', {})[column] = (raw, value)
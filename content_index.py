@@ -0,0 +1,401 @@
+"""
+Índice invertido sobre as páginas extraídas dos livros didáticos.
+
+Os termos são normalizados sem acentos e em minúsculas ("Ciências" e
+"ciencias" são o mesmo termo). Cada linha de `postings` guarda, para um termo e
+um livro, as páginas e as posições do termo em cada página, codificadas como
+varints com deltas. Adicionar um livro só insere linhas novas (reindexação
+incremental); o texto de cada página fica comprimido no índice para montar os
+trechos dos resultados sem voltar aos PDFs.
+
+Consultas aceitam termos soltos e frases entre aspas ("ciclo da agua"); as
+páginas são ordenadas por BM25.
+"""
+import heapq
+import math
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+import zlib
+from contextlib import contextmanager
+from urllib.parse import unquote
+
+from src import pdf_extractor
+
+TOKEN_PATTERN = re.compile(r'\w+')
+PHRASE_PATTERN = re.compile(r'"([^"]+)"')
+
+STOPWORDS = frozenset(
+    'a ao aos as com da das de do dos e em na nas no nos o os ou para pela pelas '
+    'pelo pelos por que se um uma umas uns'.split()
+)
+
+# Parâmetros do BM25
+K1 = 1.2
+B = 0.75
+
+
+def fold(text):
+    """Minúsculas e sem acentos ("Ciências" -> "ciencias")"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    """Lista de (termo, início, fim) com os deslocamentos no texto original"""
+    return [
+        (fold(match.group()), match.start(), match.end())
+        for match in TOKEN_PATTERN.finditer(text)
+    ]
+
+
+def parse_query(query):
+    """
+    Separa a consulta em termos soltos e frases. Cada frase é uma lista de
+    (deslocamento, termo) sem as stopwords, que não são indexadas mas contam
+    nas posições.
+    """
+    phrases = []
+    for phrase in PHRASE_PATTERN.findall(query):
+        terms = [
+            (offset, term) for offset, (term, _, _) in enumerate(tokenize(phrase))
+            if term not in STOPWORDS
+        ]
+        if terms:
+            phrases.append(terms)
+    loose = PHRASE_PATTERN.sub(' ', query)
+    terms = [term for term, _, _ in tokenize(loose) if term not in STOPWORDS]
+    return terms, phrases
+
+
+def encode_varints(values):
+    """Inteiros não negativos em varints de 7 bits"""
+    out = bytearray()
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def decode_varints(data):
+    values, value, shift = [], 0, 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value, shift = 0, 0
+    return values
+
+
+def encode_postings(pages):
+    """
+    {página: [posições]} -> bytes. Para cada página (em ordem): delta da
+    página, número de posições e os deltas das posições.
+    """
+    values, previous_page = [], 0
+    for page in sorted(pages):
+        positions = pages[page]
+        values.append(page - previous_page)
+        values.append(len(positions))
+        previous_position = 0
+        for position in positions:
+            values.append(position - previous_position)
+            previous_position = position
+        previous_page = page
+    return encode_varints(values)
+
+
+def decode_postings(data):
+    values = decode_varints(data)
+    pages, i, page = {}, 0, 0
+    while i < len(values):
+        page += values[i]
+        count = values[i + 1]
+        i += 2
+        positions, position = [], 0
+        for delta in values[i:i + count]:
+            position += delta
+            positions.append(position)
+        pages[page] = positions
+        i += count
+    return pages
+
+
+class ContentIndex:
+    """Índice invertido em um arquivo SQLite local"""
+
+    def __init__(self, path, trace=None):
+        self.path = path
+        self.trace = trace  # chamado com cada instrução SQL executada (ex.: contagem no benchmark)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(
+                'CREATE TABLE IF NOT EXISTS books ('
+                ' id INTEGER PRIMARY KEY, content_hash TEXT NOT NULL UNIQUE,'
+                ' path TEXT NOT NULL, title TEXT NOT NULL, subject TEXT);'
+                'CREATE TABLE IF NOT EXISTS pages ('
+                ' book_id INTEGER NOT NULL, page INTEGER NOT NULL,'
+                ' length INTEGER NOT NULL, text BLOB NOT NULL,'
+                ' PRIMARY KEY (book_id, page)) WITHOUT ROWID;'
+                'CREATE TABLE IF NOT EXISTS postings ('
+                ' term TEXT NOT NULL, book_id INTEGER NOT NULL, data BLOB NOT NULL,'
+                ' PRIMARY KEY (term, book_id)) WITHOUT ROWID;'
+            )
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=5)
+        if self.trace is not None:
+            connection.set_trace_callback(self.trace)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def has_book(self, content_hash):
+        with self._connect() as connection:
+            return connection.execute(
+                'SELECT 1 FROM books WHERE content_hash = ?', (content_hash,)
+            ).fetchone() is not None
+
+    def add_book(self, content_hash, path, pages, title=None, subject=None):
+        """
+        Indexa um livro a partir de (número da página, texto). Um livro com o
+        mesmo conteúdo já indexado é ignorado; uma versão anterior do mesmo
+        arquivo (mesmo caminho, outro conteúdo) é substituída.
+
+        Returns:
+            Número de páginas indexadas (0 se o livro já estava no índice)
+        """
+        if self.has_book(content_hash):
+            return 0
+
+        postings, page_rows = {}, []
+        for page, text in pages:
+            terms = [term for term, _, _ in tokenize(text)]
+            for position, term in enumerate(terms):
+                if term not in STOPWORDS:
+                    postings.setdefault(term, {}).setdefault(page, []).append(position)
+            page_rows.append((page, len(terms), zlib.compress(text.encode('utf-8'))))
+
+        with self._lock, self._connect() as connection:
+            for (book_id,) in connection.execute(
+                    'SELECT id FROM books WHERE path = ?', (path,)).fetchall():
+                self._delete_book(connection, book_id)
+            book_id = connection.execute(
+                'INSERT INTO books (content_hash, path, title, subject) VALUES (?, ?, ?, ?)',
+                (content_hash, path, title or unquote(os.path.splitext(os.path.basename(path))[0]), subject)
+            ).lastrowid
+            connection.executemany(
+                'INSERT INTO pages (book_id, page, length, text) VALUES (?, ?, ?, ?)',
+                [(book_id, page, length, text) for page, length, text in page_rows]
+            )
+            connection.executemany(
+                'INSERT INTO postings (term, book_id, data) VALUES (?, ?, ?)',
+                [
+                    (term, book_id, encode_postings(term_pages))
+                    for term, term_pages in postings.items()
+                ]
+            )
+        return len(page_rows)
+
+    def remove_book(self, content_hash):
+        with self._lock, self._connect() as connection:
+            row = connection.execute(
+                'SELECT id FROM books WHERE content_hash = ?', (content_hash,)
+            ).fetchone()
+            if row is not None:
+                self._delete_book(connection, row[0])
+
+    @staticmethod
+    def _delete_book(connection, book_id):
+        connection.execute('DELETE FROM postings WHERE book_id = ?', (book_id,))
+        connection.execute('DELETE FROM pages WHERE book_id = ?', (book_id,))
+        connection.execute('DELETE FROM books WHERE id = ?', (book_id,))
+
+    def search(self, query, limit=10, subject=None, snippet_chars=200):
+        """
+        Páginas mais relevantes para a consulta.
+
+        Returns:
+            Lista de dicionários com book, title, subject, page, score e snippet
+        """
+        terms, phrases = parse_query(query)
+        query_terms = list(dict.fromkeys(terms + [term for phrase in phrases for _, term in phrase]))
+        if not query_terms:
+            return []
+
+        with self._connect() as connection:
+            total_pages, total_length = connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(length), 0) FROM pages'
+            ).fetchone()
+            if not total_pages:
+                return []
+            avg_length = total_length / total_pages
+
+            # termo -> {(livro, página): [posições]}
+            matches = {term: {} for term in query_terms}
+            sql = 'SELECT p.term, p.book_id, p.data FROM postings p'
+            params = list(query_terms)
+            placeholders = ', '.join('?' * len(query_terms))
+            if subject:
+                sql += f' JOIN books b ON b.id = p.book_id WHERE p.term IN ({placeholders}) AND b.subject = ?'
+                params.append(subject)
+            else:
+                sql += f' WHERE p.term IN ({placeholders})'
+            for term, book_id, data in connection.execute(sql, params):
+                for page, positions in decode_postings(data).items():
+                    matches[term][(book_id, page)] = positions
+
+            candidates = self._candidates(terms, phrases, matches)
+            if not candidates:
+                return []
+
+            lengths = self._page_lengths(connection, candidates)
+            scores = {}
+            for key in candidates:
+                score = 0.0
+                for term in query_terms:
+                    positions = matches[term].get(key)
+                    if not positions:
+                        continue
+                    df = len(matches[term])
+                    idf = math.log(1 + (total_pages - df + 0.5) / (df + 0.5))
+                    tf = len(positions)
+                    norm = K1 * (1 - B + B * lengths.get(key, avg_length) / avg_length)
+                    score += idf * tf * (K1 + 1) / (tf + norm)
+                scores[key] = score
+
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            pages = self._pages(connection, [key for key, _ in top])
+            return [
+                self._result(pages[key], key[1], score, candidates[key], snippet_chars)
+                for key, score in top
+            ]
+
+    @staticmethod
+    def _candidates(terms, phrases, matches):
+        """
+        Páginas candidatas e a posição de destaque de cada uma. Com frases, são
+        as páginas que contêm todas elas (os termos soltos só entram na
+        pontuação) e a posição é o início da primeira frase encontrada. Sem
+        frases, é a união das páginas dos termos, com a menor primeira posição.
+        """
+        if phrases:
+            keys = None
+            first_hit = {}
+            for phrase in phrases:
+                (first_offset, first_term), rest = phrase[0], phrase[1:]
+                phrase_keys = set(matches[first_term])
+                for _, term in rest:
+                    phrase_keys &= set(matches[term])
+                hits = {}
+                for key in phrase_keys:
+                    following = [(offset - first_offset, set(matches[term][key])) for offset, term in rest]
+                    for start in matches[first_term][key]:
+                        if all(start + offset in positions for offset, positions in following):
+                            hits[key] = start
+                            break
+                keys = set(hits) if keys is None else keys & set(hits)
+                for key, start in hits.items():
+                    first_hit.setdefault(key, start)
+            return {key: first_hit[key] for key in keys}
+
+        candidates = {}
+        for term in terms:
+            for key, positions in matches[term].items():
+                candidates[key] = min(positions[0], candidates.get(key, positions[0]))
+        return candidates
+
+    @staticmethod
+    def _page_lengths(connection, keys, chunk_size=5000):
+        """Tamanho (em termos) das páginas, em uma consulta por bloco de `chunk_size` páginas"""
+        keys = list(keys)
+        lengths = {}
+        for start in range(0, len(keys), chunk_size):
+            for book_id, page, length in ContentIndex._select_pages(
+                    connection, 'p.length', keys[start:start + chunk_size]):
+                lengths[(book_id, page)] = length
+        return lengths
+
+    @staticmethod
+    def _pages(connection, keys):
+        """(título, disciplina, hash e texto comprimido) das páginas, em uma consulta"""
+        return {
+            (book_id, page): details
+            for book_id, page, *details in ContentIndex._select_pages(
+                connection, 'b.title, b.subject, b.content_hash, p.text', keys,
+                'JOIN books b ON b.id = p.book_id')
+        } if keys else {}
+
+    @staticmethod
+    def _select_pages(connection, columns, keys, join=''):
+        """Colunas das páginas (livro, página) em `keys`, buscadas pela chave primária"""
+        # CROSS JOIN fixa a ordem: cada chave vira uma busca pela chave primária
+        return connection.execute(
+            'WITH keys (book_id, page) AS (VALUES ' + ', '.join(['(?, ?)'] * len(keys)) + ') '
+            f'SELECT p.book_id, p.page, {columns} FROM keys k CROSS JOIN pages p '
+            f'ON p.book_id = k.book_id AND p.page = k.page {join}',
+            [value for key in keys for value in key]
+        )
+
+    @staticmethod
+    def _result(details, page, score, position, snippet_chars):
+        title, subject, content_hash, compressed = details
+        text = zlib.decompress(compressed).decode('utf-8')
+        tokens = TOKEN_PATTERN.finditer(text)
+        start = 0
+        for index, match in enumerate(tokens):
+            if index == position:
+                start = match.start()
+                break
+        begin = max(0, start - snippet_chars // 2)
+        snippet = ' '.join(text[begin:begin + snippet_chars].split())
+        return {
+            'book': content_hash,
+            'title': title,
+            'subject': subject,
+            'page': page,
+            'score': round(score, 4),
+            'snippet': snippet
+        }
+
+    def stats(self):
+        with self._connect() as connection:
+            books, pages, terms = (
+                connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                for table in ('books', 'pages', 'postings')
+            )
+        return {'books': books, 'pages': pages, 'postings': terms, 'bytes': os.path.getsize(self.path)}
+
+
+def index_directory(index, directory, cache_dir=None, subject=None, workers=None):
+    """
+    Extrai (com cache) e indexa os PDFs de um diretório. Livros já indexados
+    com o mesmo conteúdo não são processados novamente.
+
+    Returns:
+        {caminho: páginas indexadas}
+    """
+    cache_dir = cache_dir or pdf_extractor.DEFAULT_CACHE_DIR
+    indexed = {}
+    for path, result in sorted(pdf_extractor.extract_directory(directory, cache_dir, workers).items()):
+        if result is None:
+            continue
+        content_hash = result[0]
+        indexed[path] = index.add_book(
+            content_hash, path, pdf_extractor.cached_pages(content_hash, cache_dir), subject=subject
+        )
+    return indexed
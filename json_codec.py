@@ -0,0 +1,98 @@
+"""
+Camada única de JSON da aplicação (modelos, rotas, caches e spool).
+
+Usa o orjson quando instalado e cai para o módulo json da biblioteca padrão
+caso contrário. As duas implementações produzem o mesmo JSON para os tipos
+usados aqui: datetime/date viram ISO 8601, escalares/arrays do NumPy viram
+números e listas comuns e NaN/±infinito viram null (o JSON não os representa).
+"""
+import json
+import math
+from datetime import date, datetime
+
+import numpy as np
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # dependência opcional
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def default(obj):
+    """Tipos que o JSON não conhece nativamente"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f'Objeto do tipo {type(obj).__name__} não é serializável em JSON')
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj):
+        """Serializa para bytes UTF-8 (evita a cópia para str nas respostas)"""
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+
+    def dumps(obj):
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS).decode('utf-8')
+
+    def loads(data):
+        return orjson.loads(data)
+else:
+    _encoder = json.JSONEncoder(
+        default=default, ensure_ascii=False, separators=(',', ':'), allow_nan=False
+    )
+
+    def _finite(obj):
+        """Cópia de `obj` com NaN/±infinito trocados por None, como faz o orjson"""
+        if isinstance(obj, float):
+            return obj if math.isfinite(obj) else None
+        if isinstance(obj, dict):
+            return {key: _finite(value) for key, value in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [_finite(value) for value in obj]
+        if isinstance(obj, (np.generic, np.ndarray)):
+            return _finite(default(obj))
+        return obj
+
+    def _encode(obj):
+        try:
+            return _encoder.encode(obj)
+        except ValueError:
+            # NaN/infinito levantam ValueError; o caso comum não paga a cópia
+            return _encoder.encode(_finite(obj))
+
+    def dumps_bytes(obj):
+        """Serializa para bytes UTF-8 (evita a cópia para str nas respostas)"""
+        return _encode(obj).encode('utf-8')
+
+    def dumps(obj):
+        return _encode(obj)
+
+    def loads(data):
+        return json.loads(data)
+
+
+class FastJSONProvider(JSONProvider):
+    """Provedor JSON do Flask: jsonify e request.get_json passam por este módulo"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj) + b'\n', mimetype='application/json')
+
+
+def init_app(app):
+    """Faz o Flask usar este módulo em jsonify e na leitura de JSON das requisições"""
+    app.json = FastJSONProvider(app)
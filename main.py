@@ -3,16 +3,31 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+import click
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
-from src.models.student import Student, GameSession, QuizResult
+from src.models.student import (
+    migrate_indexes, find_table_scans, rebuild_game_stats, backfill_game_stats,
+    verify_game_stats, reencode_json_columns, profile_cache
+)
 from src.routes.user import user_bp
-from src.routes.ai_routes import ai_bp
+from src.routes.ai_routes import (
+    ai_bp, ai_engine, configure_write_behind, configure_content_index,
+    configure_question_bank
+)
+from src.content_index import index_directory
+from src.roster_import import import_roster
+from src.result_cache import create_result_cache
+from src.storage import configure_sqlite_storage, measure_writer_stall
+from src import column_codec, json_codec, metrics
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 
+# jsonify e request.get_json usam o codec JSON da aplicação (orjson quando instalado)
+json_codec.init_app(app)
+
 # Habilitar CORS para permitir requisições do frontend
 CORS(app)
 
@@ -22,9 +37,158 @@ app.register_blueprint(ai_bp, url_prefix='/api/ai')
 # uncomment if you need to use database
 app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+# Perfil de armazenamento: 'production' (WAL, PRAGMAs ajustados e pool de conexões) ou 'default'
+app.config['STORAGE_PROFILE'] = os.environ.get('STORAGE_PROFILE', 'production')
+configure_sqlite_storage(app)
+
+# Número máximo de perfis de aprendizagem decodificados mantidos em memória
+app.config['PROFILE_CACHE_SIZE'] = int(os.environ.get('PROFILE_CACHE_SIZE', 4096))
+profile_cache.resize(app.config['PROFILE_CACHE_SIZE'])
+
+# Cache de recomendações: 'memory' (por processo), 'sqlite' (compartilhado entre workers) ou 'none'
+app.config['RESULT_CACHE_BACKEND'] = os.environ.get('RESULT_CACHE_BACKEND', 'memory')
+app.config['RESULT_CACHE_PATH'] = os.path.join(os.path.dirname(__file__), 'database', 'result_cache.db')
+app.config['RESULT_CACHE_SIZE'] = int(os.environ.get('RESULT_CACHE_SIZE', 10000))
+app.config['RESULT_CACHE_TTL'] = int(os.environ.get('RESULT_CACHE_TTL', 300))
+ai_engine.result_cache = create_result_cache(app.config)
+
+# Gravação assíncrona (write-behind) de /record-session, desativada por padrão.
+# Cada processo grava em <spool>.<pid>.jsonl; spools de processos encerrados são reenfileirados.
+app.config['WRITE_BEHIND_ENABLED'] = os.environ.get('WRITE_BEHIND_ENABLED', '0') == '1'
+app.config['WRITE_BEHIND_SPOOL_PATH'] = os.path.join(os.path.dirname(__file__), 'database', 'session_spool.jsonl')
+app.config['WRITE_BEHIND_QUEUE_SIZE'] = int(os.environ.get('WRITE_BEHIND_QUEUE_SIZE', 10000))
+app.config['WRITE_BEHIND_FLUSH_INTERVAL'] = float(os.environ.get('WRITE_BEHIND_FLUSH_INTERVAL', 1.0))
+app.config['WRITE_BEHIND_FLUSH_SIZE'] = int(os.environ.get('WRITE_BEHIND_FLUSH_SIZE', 200))
+app.config['WRITE_BEHIND_FSYNC'] = os.environ.get('WRITE_BEHIND_FSYNC', '1') == '1'
+
+# Formato de session_data e dos JSON de quiz: 'json' (texto) ou 'msgpack' (requer o pacote msgpack).
+# Com um limite (bytes) maior que 0, valores maiores são comprimidos com zlib e gravados
+# como BLOB; o padrão 0 desativa a compressão e mantém o JSON gravado como texto.
+app.config['COLUMN_CODEC'] = os.environ.get('COLUMN_CODEC', 'json')
+app.config['COLUMN_CODEC_COMPRESS_THRESHOLD'] = int(os.environ.get('COLUMN_CODEC_COMPRESS_THRESHOLD', 0))
+column_codec.configure(app.config['COLUMN_CODEC'], app.config['COLUMN_CODEC_COMPRESS_THRESHOLD'] or None)
 db.init_app(app)
+# Registra no log requisições mais lentas que este limite (ms), com as consultas executadas
+app.config['SLOW_REQUEST_THRESHOLD_MS'] = float(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', 0)) or None
+
 with app.app_context():
     db.create_all()
+    migrate_indexes(db.engine)
+    backfill_game_stats()
+    metrics.init_app(app, db.engine)
+
+configure_write_behind(app)
+
+# Índice invertido dos livros didáticos usado por /api/ai/content-search
+app.config['CONTENT_INDEX_PATH'] = os.path.join(os.path.dirname(__file__), 'database', 'content_index.db')
+app.config['PDF_CACHE_DIR'] = os.path.join(os.path.dirname(__file__), 'database', 'pdf_cache')
+content_index = configure_content_index(app)
+
+# Banco de questões compilado com `python -m src.question_bank` (aberto com mmap)
+app.config['QUESTION_BANK_PATH'] = os.path.join(os.path.dirname(__file__), 'database', 'question_bank.bin')
+configure_question_bank(app)
+
+# Importação em massa de estudantes (/api/ai/import-roster e `flask import-roster`)
+app.config['ROSTER_IMPORT_DIR'] = os.path.join(os.path.dirname(__file__), 'database', 'imports')
+app.config['ROSTER_IMPORT_WORKERS'] = int(os.environ.get('ROSTER_IMPORT_WORKERS', 0)) or None
+
+@app.cli.command('check-query-plans')
+def check_query_plans():
+    """Falha se alguma consulta dos caminhos quentes fizer varredura completa ou ordenação em memória"""
+    offenders = find_table_scans(db.engine)
+    for name, plan in offenders.items():
+        print(f'{name}: {" | ".join(plan)}')
+    if offenders:
+        sys.exit(1)
+    print('Todas as consultas usam índices.')
+
+@app.cli.command('rebuild-game-stats')
+@click.option('--verify-only', is_flag=True, help='Apenas compara o agregado com game_sessions.')
+def rebuild_game_stats_command(verify_only):
+    """Recalcula student_game_stats a partir de game_sessions"""
+    if not verify_only:
+        rows = rebuild_game_stats()
+        print(f'{rows} agregados reconstruídos.')
+    mismatches = verify_game_stats()
+    for key, expected, stored in mismatches:
+        print(f'{key}: esperado={expected} armazenado={stored}')
+    if mismatches:
+        sys.exit(1)
+    print('Agregados consistentes com game_sessions.')
+
+@app.cli.command('rebuild-difficulty-states')
+@click.option('--verify-only', is_flag=True, help='Apenas compara os estados com o cálculo sobre as 5 últimas sessões.')
+def rebuild_difficulty_states_command(verify_only):
+    """Recalcula difficulty_states a partir de game_sessions"""
+    if not verify_only:
+        states = ai_engine.rebuild_difficulty_states()
+        print(f'{states} estados de dificuldade reconstruídos.')
+    mismatches = ai_engine.verify_difficulty_states()
+    for student_id, game_type, expected, stored in mismatches:
+        print(f'({student_id}, {game_type}): esperado={expected} armazenado={stored}')
+    if mismatches:
+        sys.exit(1)
+    print('Estados equivalentes ao cálculo sobre as 5 últimas sessões.')
+
+@app.cli.command('check-storage-concurrency')
+@click.option('--max-stall', default=0.1, help='Tempo máximo aceitável de um commit (segundos).')
+def check_storage_concurrency(max_stall):
+    """Verifica que leitores longos não bloqueiam escritores com o perfil de produção"""
+    settings = {key: app.config[key] for key in app.config if key.startswith('SQLITE_')}
+    production = measure_writer_stall(settings or None)
+    default = measure_writer_stall(None)
+    print(f'Perfil de produção: {production}')
+    print(f'Modo padrão (rollback journal): {default}')
+    if production['failed_writes'] or production['max_commit_seconds'] > max_stall:
+        sys.exit(1)
+    print('Escritores não ficam bloqueados por leitores.')
+
+@app.cli.command('reencode-json-columns')
+@click.option('--codec', type=click.Choice(['json', 'msgpack']), default=None,
+              help='Formato de destino (padrão: COLUMN_CODEC).')
+@click.option('--batch-size', default=1000, help='Linhas por transação.')
+@click.option('--compress-threshold', type=click.IntRange(min=0), default=None,
+              help='Comprime valores maiores que este limite em bytes; 0 desativa '
+                   '(padrão: COLUMN_CODEC_COMPRESS_THRESHOLD).')
+def reencode_json_columns_command(codec, batch_size, compress_threshold):
+    """Regrava session_data e os JSON de quiz no formato configurado"""
+    if compress_threshold is None:
+        compress_threshold = app.config['COLUMN_CODEC_COMPRESS_THRESHOLD']
+    rewritten = reencode_json_columns(
+        codec or app.config['COLUMN_CODEC'], batch_size, compress_threshold or None
+    )
+    for table, count in rewritten.items():
+        print(f'{table}: {count} linhas regravadas.')
+
+@app.cli.command('index-textbooks')
+@click.argument('directory')
+@click.option('--subject', default=None, help='Disciplina dos livros do diretório (ex.: math, science).')
+@click.option('--workers', type=int, default=None, help='Processos de extração (padrão: um por CPU).')
+def index_textbooks_command(directory, subject, workers):
+    """Extrai e indexa os PDFs de um diretório (livros já indexados são ignorados)"""
+    indexed = index_directory(content_index, directory, app.config['PDF_CACHE_DIR'], subject, workers)
+    for path, pages in indexed.items():
+        print(f'{path}: {pages} páginas indexadas' if pages else f'{path}: já indexado')
+    print(f'Índice: {content_index.stats()}')
+
+@app.cli.command('import-roster')
+@click.argument('path')
+@click.option('--batch-size', default=500, help='Estudantes por transação.')
+@click.option('--workers', type=int, default=None, help='Processos para calcular os perfis (padrão: um por CPU).')
+@click.option('--checkpoint', default=None, help='Arquivo de checkpoint (padrão: PATH.checkpoint).')
+def import_roster_command(path, batch_size, workers, checkpoint):
+    """Importa estudantes e quizzes iniciais de um CSV/JSONL, retomando do checkpoint"""
+    report = None
+    for report in import_roster(path, batch_size, workers or app.config['ROSTER_IMPORT_WORKERS'], checkpoint):
+        print(f"{report['rows']} linhas: {report['imported']} importados, "
+              f"{report['skipped']} já cadastrados, {report['failed']} com erro")
+    if report['resumed_from']:
+        print(f"Importação retomada a partir da linha {report['resumed_from']}.")
+    for error in report['errors']:
+        print(f"linha {error['line']}: {error['error']}")
+    if report['failed']:
+        sys.exit(1)
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
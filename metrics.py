@@ -0,0 +1,179 @@
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    """Histograma cumulativo no formato do Prometheus, com rótulos"""
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, (bucket_counts, total, count) in sorted(self._series.items()):
+                label_text = ','.join(f'{n}="{_escape(v)}"' for n, v in zip(self.label_names, labels))
+                prefix = f'{label_text},' if label_text else ''
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {bucket_count}')
+                lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+                lines.append(f'{self.name}_sum{{{label_text}}} {total}')
+                lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return lines
+
+
+class Counter:
+    """Contador no formato do Prometheus, com rótulos"""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                label_text = ','.join(f'{n}="{_escape(v)}"' for n, v in zip(self.label_names, labels))
+                lines.append(f'{self.name}{{{label_text}}} {value}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+request_duration = Histogram(
+    'edugames_request_duration_seconds', 'Latência das requisições HTTP', ('endpoint', 'method'))
+requests_total = Counter(
+    'edugames_requests_total', 'Requisições HTTP atendidas', ('endpoint', 'method', 'status'))
+request_queries = Histogram(
+    'edugames_request_queries', 'Consultas SQL por requisição', ('endpoint',), QUERY_COUNT_BUCKETS)
+request_query_duration = Histogram(
+    'edugames_request_query_seconds', 'Tempo gasto em SQL por requisição', ('endpoint',))
+operation_duration = Histogram(
+    'edugames_operation_duration_seconds',
+    'Tempo de operações internas (motor adaptativo, decodificação de JSON)', ('operation',))
+
+REGISTRY = [request_duration, requests_total, request_queries, request_query_duration, operation_duration]
+
+
+@contextmanager
+def timer(operation):
+    """Mede o tempo de um bloco e registra em edugames_operation_duration_seconds"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        operation_duration.observe(time.perf_counter() - start, operation)
+
+
+def timed(operation):
+    """Decorador equivalente a timer() para métodos e funções"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(operation):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'metrics_queries' in g:
+        g.metrics_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'metrics_queries' in g:
+        elapsed = time.perf_counter() - g.pop('metrics_query_start', time.perf_counter())
+        g.metrics_query_count += 1
+        g.metrics_query_time += elapsed
+        if g.metrics_queries is not None:
+            g.metrics_queries.append((statement, elapsed))
+
+
+def init_app(app, engine):
+    """
+    Ativa a instrumentação: latência por endpoint, consultas SQL por requisição
+    (eventos do SQLAlchemy no `engine`) e o endpoint /metrics. Com
+    SLOW_REQUEST_THRESHOLD_MS definido, requisições mais lentas são registradas
+    no log com a lista de consultas executadas.
+    """
+    from sqlalchemy import event
+
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    slow_threshold_ms = app.config.get('SLOW_REQUEST_THRESHOLD_MS')
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        g.metrics_query_count = 0
+        g.metrics_query_time = 0.0
+        g.metrics_queries = [] if slow_threshold_ms else None
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'metrics_start' not in g:
+            return response
+        elapsed = time.perf_counter() - g.metrics_start
+        endpoint = request.endpoint or 'unknown'
+
+        request_duration.observe(elapsed, endpoint, request.method)
+        requests_total.inc(endpoint, request.method, str(response.status_code))
+        request_queries.observe(g.metrics_query_count, endpoint)
+        request_query_duration.observe(g.metrics_query_time, endpoint)
+
+        if slow_threshold_ms and elapsed * 1000 > slow_threshold_ms:
+            logger.warning(
+                'Requisição lenta: %s %s (%s) em %.1fms, %d consultas (%.1fms em SQL)\n%s',
+                request.method, request.path, endpoint, elapsed * 1000,
+                g.metrics_query_count, g.metrics_query_time * 1000,
+                '\n'.join(f'  [{duration * 1000:.1f}ms] {statement}' for statement, duration in g.metrics_queries)
+            )
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
@@ -1,22 +1,167 @@
-from bs4 import BeautifulSoup
+import argparse
+import gzip
+import hashlib
+import os
 import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-def extract_text_from_pdf(pdf_path):
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'database', 'pdf_cache')
+PAGES_PER_CALL = 20
+PAGE_BREAK = '\f'  # pdftotext ends every page with a form feed
+
+
+def page_count(pdf_path):
+    """Number of pages reported by pdfinfo"""
+    output = subprocess.check_output(["pdfinfo", pdf_path]).decode("utf-8", "replace")
+    for line in output.splitlines():
+        if line.startswith("Pages:"):
+            return int(line.split(":", 1)[1])
+    raise ValueError(f"pdfinfo did not report a page count for {pdf_path}")
+
+
+def iter_pages(pdf_path, first=1, last=None, pages_per_call=PAGES_PER_CALL):
+    """
+    Yield (page_number, text) for each page, converting at most
+    `pages_per_call` pages per pdftotext call so memory stays bounded.
+    """
+    last = last or page_count(pdf_path)
+    for start in range(first, last + 1, pages_per_call):
+        end = min(start + pages_per_call - 1, last)
+        output = subprocess.check_output(
+            ["pdftotext", "-f", str(start), "-l", str(end), "-enc", "UTF-8", pdf_path, "-"]
+        ).decode("utf-8", "replace")
+        pages = output.split(PAGE_BREAK)
+        for offset in range(end - start + 1):
+            yield start + offset, pages[offset] if offset < len(pages) else ""
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """SHA-256 of the file contents (the cache key)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path(content_hash, cache_dir=DEFAULT_CACHE_DIR):
+    return os.path.join(cache_dir, f"{content_hash}.txt.gz")
+
+
+def page_count_path(content_hash, cache_dir=DEFAULT_CACHE_DIR):
+    """Sidecar holding the page count, so a cache hit never decompresses the text"""
+    return os.path.join(cache_dir, f"{content_hash}.pages")
+
+
+def _write_page_count(content_hash, pages, cache_dir):
+    target = page_count_path(content_hash, cache_dir)
+    partial = f"{target}.{os.getpid()}.tmp"
+    with open(partial, "w", encoding="utf-8") as handle:
+        handle.write(str(pages))
+    os.replace(partial, target)
+
+
+def cached_page_count(content_hash, cache_dir=DEFAULT_CACHE_DIR):
+    """Page count of a cached extraction (entries without a sidecar are counted once)"""
+    try:
+        with open(page_count_path(content_hash, cache_dir), encoding="utf-8") as handle:
+            return int(handle.read())
+    except (OSError, ValueError):
+        pages = sum(1 for _ in cached_pages(content_hash, cache_dir))
+        _write_page_count(content_hash, pages, cache_dir)
+        return pages
+
+
+def cached_pages(content_hash, cache_dir=DEFAULT_CACHE_DIR, chunk_size=64 * 1024):
+    """Yield (page_number, text) from a cached extraction, reading it incrementally"""
+    with gzip.open(cache_path(content_hash, cache_dir), "rt", encoding="utf-8") as handle:
+        page_number, pending = 1, ""
+        for chunk in iter(lambda: handle.read(chunk_size), ""):
+            pages = (pending + chunk).split(PAGE_BREAK)
+            pending = pages.pop()
+            for text in pages:
+                yield page_number, text
+                page_number += 1
+
+
+def extract_to_cache(pdf_path, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Extract a PDF into the cache unless its contents are already there.
+
+    Returns:
+        (content_hash, page_count, extracted) - extracted is False on a cache hit
+    """
+    content_hash = file_hash(pdf_path)
+    target = cache_path(content_hash, cache_dir)
+    if os.path.exists(target):
+        return content_hash, cached_page_count(content_hash, cache_dir), False
+
+    os.makedirs(cache_dir, exist_ok=True)
+    partial = f"{target}.{os.getpid()}.tmp"
+    pages = 0
+    with gzip.open(partial, "wt", encoding="utf-8") as handle:
+        for _, text in iter_pages(pdf_path):
+            handle.write(text.replace(PAGE_BREAK, "\n") + PAGE_BREAK)
+            pages += 1
+    _write_page_count(content_hash, pages, cache_dir)  # before the text: a visible entry always has its count
+    os.replace(partial, target)  # readers never see a half-written cache entry
+    return content_hash, pages, True
+
+
+def extract_pages(pdf_path, cache_dir=DEFAULT_CACHE_DIR):
+    """Yield (page_number, text) for a PDF, extracting it only if it is not cached"""
+    content_hash, _, _ = extract_to_cache(pdf_path, cache_dir)
+    yield from cached_pages(content_hash, cache_dir)
+
+
+def extract_directory(directory, cache_dir=DEFAULT_CACHE_DIR, workers=None):
+    """
+    Extract every PDF under `directory` into the cache on a process pool.
+
+    Returns:
+        {pdf_path: (content_hash, page_count, extracted)}; failed files map to None
+    """
+    pdf_paths = sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(directory)
+        for name in names if name.lower().endswith(".pdf")
+    )
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(extract_to_cache, path, cache_dir): path for path in pdf_paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except (subprocess.CalledProcessError, OSError, ValueError) as e:
+                print(f"Error extracting {path}: {e}", file=sys.stderr)
+                results[path] = None
+    return results
+
+
+def extract_text_from_pdf(pdf_path, cache_dir=DEFAULT_CACHE_DIR):
     try:
-        # Convert PDF to HTML using pdftohtml
-        html_output = subprocess.check_output(["pdftohtml", "-s", "-stdout", pdf_path])
-        soup = BeautifulSoup(html_output, "html.parser")
-        text = soup.get_text()
-        return text
+        return "\n".join(text for _, text in extract_pages(pdf_path, cache_dir))
     except subprocess.CalledProcessError as e:
-        print(f"Error converting PDF to HTML: {e}")
+        print(f"Error converting PDF to text: {e}")
         return None
 
-if __name__ == "__main__":
-    pdf_file = "/home/ubuntu/sge.maracanau.ce.gov.br/livros/BCM_Introdu%C3%A7%C3%A3o_.pdf"
-    extracted_text = extract_text_from_pdf(pdf_file)
-    if extracted_text:
-        print(extracted_text)
-    
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract text from a PDF or a directory of PDFs")
+    parser.add_argument("path", nargs="?",
+                        default="/home/ubuntu/sge.maracanau.ce.gov.br/livros/BCM_Introdu%C3%A7%C3%A3o_.pdf")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
 
+    if os.path.isdir(args.path):
+        for path, result in sorted(extract_directory(args.path, args.cache_dir, args.workers).items()):
+            if result:
+                content_hash, pages, extracted = result
+                print(f"{'extracted' if extracted else 'cached':9s} {pages:5d} pages  {content_hash[:12]}  {path}")
+    else:
+        extracted_text = extract_text_from_pdf(args.path, args.cache_dir)
+        if extracted_text:
+            print(extracted_text)
@@ -0,0 +1,124 @@
+"""
+Regras de palavras-chave usadas na análise do quiz de perfil.
+
+Cada tabela associa categorias a palavras-chave (vocabulário em inglês e em
+português) e é compilada uma única vez, na importação do módulo, em uma
+expressão regular que encontra todas as palavras-chave de um texto em uma só
+passada. O motor adaptativo (ai_engine) e a simulação do quiz
+(quiz_simulation) usam as mesmas tabelas.
+
+Semântica, igual à das verificações `palavra in valor` que as tabelas
+substituem: em um texto, a palavra-chave pode aparecer em qualquer posição;
+em uma lista, precisa ser igual a um dos itens. A comparação ignora
+maiúsculas/minúsculas.
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+
+
+class KeywordTable:
+    """Tabela categoria -> palavras-chave compilada em um único matcher"""
+
+    def __init__(self, categories, cache_size=4096):
+        self.categories = list(categories)
+        self._keyword_category = {}
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                self._keyword_category[keyword.lower()] = category
+
+        keywords = sorted(self._keyword_category, key=len, reverse=True)
+        # Onde uma palavra-chave aparece, as contidas nela também aparecem
+        self._implied = {
+            keyword: frozenset(other for other in keywords if other in keyword)
+            for keyword in keywords
+        }
+        # Lookahead: testa todas as posições, inclusive as sobrepostas
+        self._pattern = re.compile(
+            '(?=(' + '|'.join(re.escape(keyword) for keyword in keywords) + '))', re.IGNORECASE
+        )
+        self._scan_text = lru_cache(maxsize=cache_size)(self._scan)
+
+    def _scan(self, text):
+        found = set()
+        for match in self._pattern.finditer(text):
+            found |= self._implied[match.group(1).lower()]
+        return frozenset(found)
+
+    def keywords_in(self, value):
+        """Palavras-chave presentes no valor (texto ou lista de itens)"""
+        if isinstance(value, str):
+            return self._scan_text(value)
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return frozenset(
+                item.lower() for item in value
+                if isinstance(item, str) and item.lower() in self._keyword_category
+            )
+        return frozenset()
+
+    def count(self, value):
+        """Número de palavras-chave distintas encontradas por categoria"""
+        return Counter(self._keyword_category[keyword] for keyword in self.keywords_in(value))
+
+    def categories_in(self, value):
+        """Categorias encontradas, na ordem da tabela"""
+        found = {self._keyword_category[keyword] for keyword in self.keywords_in(value)}
+        return [category for category in self.categories if category in found]
+
+    def first_category(self, value, default=None):
+        """Primeira categoria da tabela encontrada no valor (a tabela define a prioridade)"""
+        found = self.categories_in(value)
+        return found[0] if found else default
+
+
+# learning_preference (peso 2 no estilo de aprendizagem)
+LEARNING_PREFERENCE = KeywordTable({
+    'visual': ('visual', 'images', 'diagrams', 'imagens', 'diagramas'),
+    'auditory': ('audio', 'listening', 'music', 'auditivo', 'ouvir'),
+    'kinesthetic': ('hands_on', 'practice', 'movement', 'pratico', 'movimento'),
+    'reading_writing': ('reading', 'writing', 'text', 'leitura', 'escrita'),
+})
+
+# favorite_activities (peso 1 no estilo de aprendizagem)
+FAVORITE_ACTIVITIES = KeywordTable({
+    'visual': ('drawing', 'watching', 'observing', 'desenhar', 'assistir', 'observar'),
+    'auditory': ('music', 'talking', 'listening', 'musica', 'conversar', 'ouvir'),
+    'kinesthetic': ('sports', 'building', 'experimenting', 'esportes', 'construir', 'experimentar'),
+    'reading_writing': ('reading', 'writing', 'researching', 'leitura', 'escrever', 'pesquisar'),
+})
+
+# preferred_activities -> elementos STEAM (cada palavra-chave encontrada soma 1)
+STEAM_ACTIVITIES = KeywordTable({
+    'investigar': ('research', 'experiment', 'pesquisar', 'investigar'),
+    'descobrir': ('explore', 'discover', 'explorar', 'descobrir'),
+    'conectar': ('collaborate', 'connect', 'colaborar', 'conectar'),
+    'criar': ('build', 'create', 'construir', 'criar'),
+    'refletir': ('analyze', 'think', 'analisar', 'pensar', 'refletir'),
+})
+
+# challenge_preference: a primeira categoria encontrada vence
+CHALLENGE_PREFERENCE = KeywordTable({
+    'low': ('easy', 'simple', 'facil'),
+    'high': ('hard', 'difficult', 'challenge', 'dificil', 'desafi'),
+})
+
+# Quiz simplificado (quiz_simulation): rótulos em português
+QUIZ_SUBJECT_INTERESTS = KeywordTable({
+    'Matemática/Lógica': ('matematica',),
+    'Robótica/Programação': ('robotica',),
+    'Ciências/Experimentação': ('ciencias',),
+    'Arte/Criatividade': ('arte',),
+})
+
+QUIZ_MOTIVATION = KeywordTable({
+    'Gostar de desafios': ('desafios',),
+    'Recompensas e reconhecimento': ('recompensas',),
+    'Aprender coisas novas': ('aprender_novo',),
+})
+
+LEARNING_STYLE_LABELS = {
+    'kinesthetic': 'Cinestésico (Prático)',
+    'visual': 'Visual',
+    'auditory': 'Auditivo',
+    'reading_writing': 'Leitura/Escrita',
+}
@@ -0,0 +1,120 @@
+"""
+Orçamento de consultas SQL por endpoint de /api/ai (proteção contra N+1).
+
+Popula bancos sintéticos de tamanhos crescentes, chama cada endpoint e conta
+as instruções SQL de cada requisição. Termina com código 1 se algum endpoint
+passar do orçamento declarado em QUERY_BUDGETS ou se o número de consultas
+crescer junto com o volume de dados.
+
+Uso:
+    python -m src.query_budget --sizes 5,50,200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+from src.benchmark_ai_routes import (
+    create_app, seed_database, seed_content, run_benchmark, RECORD_BATCH_SIZES
+)
+from src.models.student import db, migrate_indexes
+
+# Máximo de instruções SQL por requisição. Os lotes (record-sessions em cada
+# tamanho de RECORD_BATCH_SIZES, import-roster com ROSTER_ROWS linhas) têm
+# orçamento constante: o número de instruções não depende do tamanho do lote.
+RECORD_SESSIONS_BUDGET = 6
+QUERY_BUDGETS = {
+    'analyze-quiz': 4,
+    'recommend-difficulty': 3,
+    'recommend-games': 3,
+    'record-session': 6,
+    **{f'record-sessions-{size}': RECORD_SESSIONS_BUDGET for size in RECORD_BATCH_SIZES},
+    'student-progress': 3,
+    'student-progress-page': 3,
+    'adaptive-feedback': 4,
+    'learning-analytics': 4,
+    'learning-analytics-sessions': 2,
+    'cohort-difficulty': 2,
+    'class-analytics': 2,
+    'school-analytics': 2,
+    'content-search': 4,
+    'questions': 2,
+    'import-roster': 3,
+    'cache-stats': 0,
+}
+
+# Cenários que devem executar o mesmo número de instruções
+SAME_COUNT_GROUPS = [
+    tuple(f'record-sessions-{size}' for size in RECORD_BATCH_SIZES),
+]
+
+
+def measure(sessions_per_student, students, requests_per_endpoint, seed):
+    """Máximo de consultas por requisição de cada endpoint para um tamanho de dados"""
+    rng = random.Random(seed)
+    app = create_app(os.path.join(tempfile.mkdtemp(), 'query_budget.db'))
+    with app.app_context():
+        db.create_all()
+        migrate_indexes(db.engine)
+        student_ids = seed_database(students, sessions_per_student, 2, rng)
+    seed_content(app, rng)
+    results = run_benchmark(app, requests_per_endpoint, rng, student_ids, 2)
+    return {name: result['max_queries'] for name, result in results.items()}
+
+
+def check_budgets(measurements, budgets=QUERY_BUDGETS, same_count_groups=SAME_COUNT_GROUPS):
+    """
+    Compara as medições (tamanho -> endpoint -> consultas) com os orçamentos,
+    entre os tamanhos e entre os cenários de cada grupo de same_count_groups.
+    Retorna a lista de violações.
+    """
+    sizes = sorted(measurements)
+    violations = []
+    for name in measurements[sizes[0]]:
+        counts = [measurements[size][name] for size in sizes]
+        budget = budgets.get(name)
+        if budget is None:
+            violations.append(f'{name}: sem orçamento declarado (medido: {counts})')
+        elif max(counts) > budget:
+            violations.append(f'{name}: {max(counts)} consultas, orçamento {budget} ({counts})')
+        if counts[-1] > counts[0]:
+            violations.append(
+                f'{name}: consultas crescem com os dados '
+                f'({", ".join(f"{size}={count}" for size, count in zip(sizes, counts))})'
+            )
+    for group in same_count_groups:
+        for size in sizes:
+            counts = {name: measurements[size][name] for name in group if name in measurements[size]}
+            if len(set(counts.values())) > 1:
+                violations.append(
+                    f'{", ".join(counts)}: número de consultas muda com o tamanho do lote '
+                    f'({", ".join(f"{name}={count}" for name, count in counts.items())})'
+                )
+    return violations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='5,50,200', help='sessões por estudante em cada rodada')
+    parser.add_argument('--students', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=20, help='requisições por endpoint')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    measurements = {}
+    for size in (int(value) for value in args.sizes.split(',')):
+        print(f'--- {size} sessões por estudante ---')
+        measurements[size] = measure(size, args.students, args.requests, args.seed)
+
+    violations = check_budgets(measurements)
+    for violation in violations:
+        print(f'FALHA {violation}')
+    if violations:
+        return 1
+    print('Todos os endpoints dentro do orçamento de consultas.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""
+Banco de questões compilado em um arquivo binário aberto com mmap.
+
+As questões ficam agrupadas por (game_type, dificuldade 1-10). Uma tabela de
+offsets de tamanho fixo leva de cada grupo ao intervalo das suas questões, e
+cada questão é um documento JSON independente. Sortear uma questão lê só a
+tabela e os bytes da questão sorteada; como o arquivo é mapeado em modo de
+leitura, os workers do Flask compartilham as páginas pelo cache do sistema
+operacional.
+
+Formato (inteiros little-endian):
+    cabeçalho    magic "EDQB", versão (u16), nº de tipos de jogo (u16),
+                 nº de questões (u32)
+    tipos        para cada tipo: tamanho (u16) e nome em UTF-8
+    grupos       para cada tipo e dificuldade 1-10: primeira questão (u32) e
+                 quantidade (u32)
+    offsets      nº de questões + 1 offsets (u64) relativos à área de dados
+    dados        questões em JSON, na ordem dos grupos
+
+Uso:
+    python -m src.question_bank questoes.json --output database/question_bank.bin
+"""
+import argparse
+import mmap
+import os
+import random
+import re
+import struct
+import sys
+
+from src import json_codec
+from src.content_index import ContentIndex
+
+MAGIC = b'EDQB'
+VERSION = 1
+DIFFICULTY_LEVELS = 10
+
+_HEADER = struct.Struct('<4sHHI')
+_NAME_LENGTH = struct.Struct('<H')
+_BUCKET = struct.Struct('<II')
+_OFFSET = struct.Struct('<Q')
+
+
+def build_question_bank(questions, path):
+    """
+    Compila questões (dicionários com 'game_type' e 'difficulty' de 1 a 10)
+    no arquivo `path`. O arquivo é substituído atomicamente.
+
+    Returns:
+        Número de questões por (game_type, dificuldade)
+    """
+    buckets = {}
+    for question in questions:
+        difficulty = int(round(question['difficulty']))
+        if not 1 <= difficulty <= DIFFICULTY_LEVELS:
+            raise ValueError(f'Dificuldade fora de 1-{DIFFICULTY_LEVELS}: {question}')
+        buckets.setdefault((question['game_type'], difficulty), []).append(
+            json_codec.dumps_bytes(question)
+        )
+
+    game_types = sorted({game_type for game_type, _ in buckets})
+    total = sum(len(encoded) for encoded in buckets.values())
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    partial = f'{path}.{os.getpid()}.tmp'
+    with open(partial, 'wb') as output:
+        output.write(_HEADER.pack(MAGIC, VERSION, len(game_types), total))
+        for game_type in game_types:
+            name = game_type.encode('utf-8')
+            output.write(_NAME_LENGTH.pack(len(name)) + name)
+
+        ordered, first = [], 0
+        for game_type in game_types:
+            for difficulty in range(1, DIFFICULTY_LEVELS + 1):
+                encoded = buckets.get((game_type, difficulty), [])
+                output.write(_BUCKET.pack(first, len(encoded)))
+                ordered.extend(encoded)
+                first += len(encoded)
+
+        offset = 0
+        for encoded in ordered:
+            output.write(_OFFSET.pack(offset))
+            offset += len(encoded)
+        output.write(_OFFSET.pack(offset))
+
+        for encoded in ordered:
+            output.write(encoded)
+    os.replace(partial, path)
+
+    return {key: len(encoded) for key, encoded in buckets.items()}
+
+
+class QuestionBank:
+    """Leitura de um banco compilado com build_question_bank"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, type_count, self.size = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} não é um banco de questões compatível')
+
+        position = _HEADER.size
+        self._type_index = {}
+        for index in range(type_count):
+            (length,) = _NAME_LENGTH.unpack_from(self._map, position)
+            position += _NAME_LENGTH.size
+            self._type_index[bytes(self._map[position:position + length]).decode('utf-8')] = index
+            position += length
+
+        self._buckets_start = position
+        self._offsets_start = position + type_count * DIFFICULTY_LEVELS * _BUCKET.size
+        self._data_start = self._offsets_start + (self.size + 1) * _OFFSET.size
+
+    def close(self):
+        self._map.close()
+
+    @property
+    def game_types(self):
+        return list(self._type_index)
+
+    def bucket(self, game_type, difficulty):
+        """(primeira questão, quantidade) do grupo; (0, 0) se não existir"""
+        index = self._type_index.get(game_type)
+        if index is None or not 1 <= difficulty <= DIFFICULTY_LEVELS:
+            return 0, 0
+        return _BUCKET.unpack_from(
+            self._map, self._buckets_start + (index * DIFFICULTY_LEVELS + difficulty - 1) * _BUCKET.size
+        )
+
+    def question(self, number):
+        """Decodifica a questão de número `number` (posição no arquivo)"""
+        start, end = struct.unpack_from('<QQ', self._map, self._offsets_start + number * _OFFSET.size)
+        return json_codec.loads(self._map[self._data_start + start:self._data_start + end])
+
+    def sample(self, game_type, difficulty, count=1, rng=random, nearest=True):
+        """
+        Sorteia até `count` questões distintas do grupo. A dificuldade pode
+        ser fracionária (como a de calculate_next_difficulty) e é arredondada.
+        Com nearest=True, um grupo vazio cede lugar ao grupo não vazio de
+        dificuldade mais próxima.
+        """
+        difficulty = min(max(int(round(difficulty)), 1), DIFFICULTY_LEVELS)
+        levels = [difficulty]
+        if nearest:
+            levels += [
+                level
+                for distance in range(1, DIFFICULTY_LEVELS)
+                for level in (difficulty - distance, difficulty + distance)
+                if 1 <= level <= DIFFICULTY_LEVELS
+            ]
+
+        for level in levels:
+            first, size = self.bucket(game_type, level)
+            if size:
+                return [self.question(first + i) for i in rng.sample(range(size), min(count, size))]
+        return []
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'questions': self.size,
+            'bytes': len(self._map),
+            'buckets': {
+                game_type: [self.bucket(game_type, level)[1] for level in range(1, DIFFICULTY_LEVELS + 1)]
+                for game_type in self._type_index
+            }
+        }
+
+
+def load_questions(path):
+    """Questões de um arquivo JSON (lista) ou JSONL (uma questão por linha)"""
+    with open(path, encoding='utf-8') as source:
+        if path.endswith('.jsonl'):
+            return [json_codec.loads(line) for line in source if line.strip()]
+        return json_codec.loads(source.read())
+
+
+_SENTENCE_END = re.compile(r'[.!?]+')
+
+
+def estimate_difficulty(text):
+    """
+    Dificuldade de leitura de 1 a 10 a partir do tamanho médio das palavras e
+    das frases (heurística para trechos sem dificuldade atribuída)
+    """
+    words = text.split()
+    if not words:
+        return 1
+    sentences = max(1, len(_SENTENCE_END.findall(text)))
+    word_length = sum(len(word) for word in words) / len(words)
+    sentence_length = len(words) / sentences
+    score = (word_length - 3.5) * 1.5 + (sentence_length - 8) / 4
+    return min(max(int(round(score)) + 3, 1), DIFFICULTY_LEVELS)
+
+
+def questions_from_content_index(index, topics, per_topic=50):
+    """
+    Questões de leitura a partir do índice de conteúdo: para cada game_type,
+    os trechos mais relevantes da consulta em `topics` ({game_type: consulta}
+    ou {game_type: (consulta, disciplina)}).
+    """
+    for game_type, topic in topics.items():
+        query, subject = topic if isinstance(topic, tuple) else (topic, None)
+        for result in index.search(query, limit=per_topic, subject=subject):
+            yield {
+                'game_type': game_type,
+                'difficulty': estimate_difficulty(result['snippet']),
+                'type': 'reading',
+                'text': result['snippet'],
+                'source': {'title': result['title'], 'page': result['page'], 'book': result['book']}
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('sources', nargs='*', help='arquivos .json/.jsonl de questões')
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--content-index', help='índice de conteúdo para gerar questões de leitura')
+    parser.add_argument('--topic', action='append', default=[],
+                        help='game_type=consulta[:disciplina] (com --content-index)')
+    parser.add_argument('--per-topic', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    questions = []
+    for source in args.sources:
+        questions.extend(load_questions(source))
+    if args.content_index:
+        topics = {}
+        for topic in args.topic:
+            game_type, query = topic.split('=', 1)
+            query, _, subject = query.partition(':')
+            topics[game_type] = (query, subject or None)
+        questions.extend(questions_from_content_index(ContentIndex(args.content_index), topics, args.per_topic))
+
+    counts = build_question_bank(questions, args.output)
+    for (game_type, difficulty), count in sorted(counts.items()):
+        print(f'{game_type:15s} nível {difficulty:2d}: {count} questões')
+    print(f'{sum(counts.values())} questões gravadas em {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,7 @@
+from src.profile_rules import (
+    LEARNING_PREFERENCE, LEARNING_STYLE_LABELS, QUIZ_SUBJECT_INTERESTS, QUIZ_MOTIVATION
+)
+
 def process_quiz_answers(answers):
     """
     Processa as respostas do quiz para gerar um perfil de aprendizagem simplificado.
@@ -9,60 +13,46 @@ def process_quiz_answers(answers):
         "motivacao": []
     }
 
-    # Lógica simplificada para determinar o estilo de aprendizagem
-    if answers.get("q1_learning_preference") == "pratico":
-        profile["estilo_aprendizagem"] = "Cinestésico (Prático)"
-    elif answers.get("q1_learning_preference") == "visual":
-        profile["estilo_aprendizagem"] = "Visual"
-    elif answers.get("q1_learning_preference") == "auditivo":
-        profile["estilo_aprendizagem"] = "Auditivo"
-    else:
-        profile["estilo_aprendizagem"] = "Leitura/Escrita"
+    # Estilo de aprendizagem (mesma tabela de regras do motor adaptativo)
+    style = LEARNING_PREFERENCE.first_category(answers.get("q1_learning_preference"), "reading_writing")
+    profile["estilo_aprendizagem"] = LEARNING_STYLE_LABELS[style]
 
-    # Lógica para interesses principais (exemplo com base em matérias)
-    if "matematica" in answers.get("q2_favorite_subjects", []):
-        profile["interesses_principais"].append("Matemática/Lógica")
-    if "robotica" in answers.get("q2_favorite_subjects", []):
-        profile["interesses_principais"].append("Robótica/Programação")
-    if "ciencias" in answers.get("q2_favorite_subjects", []):
-        profile["interesses_principais"].append("Ciências/Experimentação")
-    if "arte" in answers.get("q2_favorite_subjects", []):
-        profile["interesses_principais"].append("Arte/Criatividade")
+    # Interesses principais (com base em matérias)
+    profile["interesses_principais"] = QUIZ_SUBJECT_INTERESTS.categories_in(answers.get("q2_favorite_subjects", []))
 
     # Preferência de dificuldade
     profile["preferencia_dificuldade"] = answers.get("q3_challenge_preference", "medio")
 
     # Motivação
-    if "desafios" in answers.get("q4_motivation", []):
-        profile["motivacao"].append("Gostar de desafios")
-    if "recompensas" in answers.get("q4_motivation", []):
-        profile["motivacao"].append("Recompensas e reconhecimento")
-    if "aprender_novo" in answers.get("q4_motivation", []):
-        profile["motivacao"].append("Aprender coisas novas")
+    profile["motivacao"] = QUIZ_MOTIVATION.categories_in(answers.get("q4_motivation", []))
 
     return profile
 
-# --- Simulação de Respostas do Quiz ---
-# Estas respostas simulam o que um aluno poderia escolher no quiz.
-# Você pode alterar esses valores para ver como o perfil muda.
 
-simulated_answers = {
-    "q1_learning_preference": "pratico", # opções: "visual", "auditivo", "pratico", "leitura_escrita"
-    "q2_favorite_subjects": ["matematica", "robotica", "ciencias"], # opções: "matematica", "ciencias", "portugues", "ingles", "historia", "geografia", "arte", "educacao_fisica", "robotica", "programacao"
-    "q3_challenge_preference": "dificil", # opções: "facil", "medio", "dificil"
-    "q4_motivation": ["desafios", "recompensas"] # opções: "pontos", "competicao", "colaboracao", "descoberta", "criacao", "reconhecimento", "diversao", "conquista"
-}
+def process_quiz_answers_batch(answer_sets):
+    """Processa um lote de respostas (importação em massa)"""
+    return [process_quiz_answers(answers) for answers in answer_sets]
 
-# Processa as respostas simuladas
-learning_profile = process_quiz_answers(simulated_answers)
+if __name__ == "__main__":
+    # --- Simulação de Respostas do Quiz ---
+    # Estas respostas simulam o que um aluno poderia escolher no quiz.
+    # Você pode alterar esses valores para ver como o perfil muda.
 
-# Imprime o perfil de aprendizagem gerado
-print("--- Perfil de Aprendizagem Gerado ---")
-for key, value in learning_profile.items():
-    print(f"{key.replace("_", " ").title()}: {value}")
+    simulated_answers = {
+        "q1_learning_preference": "pratico", # opções: "visual", "auditivo", "pratico", "leitura_escrita"
+        "q2_favorite_subjects": ["matematica", "robotica", "ciencias"], # opções: "matematica", "ciencias", "portugues", "ingles", "historia", "geografia", "arte", "educacao_fisica", "robotica", "programacao"
+        "q3_challenge_preference": "dificil", # opções: "facil", "medio", "dificil"
+        "q4_motivation": ["desafios", "recompensas"] # opções: "pontos", "competicao", "colaboracao", "descoberta", "criacao", "reconhecimento", "diversao", "conquista"
+    }
 
-print("\nEste é um exemplo simplificado da lógica de IA do aplicativo.")
-print("Você pode copiar este código e colá-lo no mycompiler.io para testar.")
-print("Altere os valores em 'simulated_answers' para ver diferentes perfis!")
+    # Processa as respostas simuladas
+    learning_profile = process_quiz_answers(simulated_answers)
 
+    # Imprime o perfil de aprendizagem gerado
+    print("--- Perfil de Aprendizagem Gerado ---")
+    for key, value in learning_profile.items():
+        print(f"{key.replace('_', ' ').title()}: {value}")
 
+    print("\nEste é um exemplo simplificado da lógica de IA do aplicativo.")
+    print("Execute com `python -m src.quiz_simulation` a partir da raiz do projeto.")
+    print("Altere os valores em 'simulated_answers' para ver diferentes perfis!")
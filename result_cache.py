@@ -0,0 +1,167 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from src import json_codec
+
+
+class MemoryResultCache:
+    """
+    Cache de resultados em memória do processo, com TTL e remoção LRU.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'backend': 'memory',
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+class SQLiteResultCache:
+    """
+    Cache de resultados em um arquivo SQLite local, compartilhado entre os
+    workers da mesma máquina. Os valores são guardados como JSON.
+    """
+
+    def __init__(self, path, maxsize=10000, ttl=300):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS result_cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'expires_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS ix_result_cache_accessed_at '
+                'ON result_cache (accessed_at)'
+            )
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=5)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get(self, key):
+        key = repr(key)
+        now = time.time()
+        with self._connect() as connection:
+            row = connection.execute(
+                'SELECT value FROM result_cache WHERE key = ? AND expires_at > ?', (key, now)
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    'UPDATE result_cache SET accessed_at = ? WHERE key = ?', (now, key)
+                )
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json_codec.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO result_cache (key, value, expires_at, accessed_at) '
+                'VALUES (?, ?, ?, ?)',
+                (repr(key), json_codec.dumps(value), now + self.ttl, now)
+            )
+            connection.execute('DELETE FROM result_cache WHERE expires_at <= ?', (now,))
+            connection.execute(
+                'DELETE FROM result_cache WHERE key IN ('
+                'SELECT key FROM result_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                (self.maxsize,)
+            )
+
+    def clear(self):
+        with self._connect() as connection:
+            connection.execute('DELETE FROM result_cache')
+
+    def stats(self):
+        with self._connect() as connection:
+            size = connection.execute('SELECT COUNT(*) FROM result_cache').fetchone()[0]
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'backend': 'sqlite',
+                'path': self.path,
+                'size': size,
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+def create_result_cache(config):
+    """
+    Cria o cache de resultados conforme a configuração da aplicação:
+    RESULT_CACHE_BACKEND ('memory', 'sqlite' ou 'none'), RESULT_CACHE_PATH,
+    RESULT_CACHE_SIZE e RESULT_CACHE_TTL (segundos).
+    """
+    backend = config.get('RESULT_CACHE_BACKEND', 'memory')
+    maxsize = config.get('RESULT_CACHE_SIZE', 10000)
+    ttl = config.get('RESULT_CACHE_TTL', 300)
+
+    if backend == 'sqlite':
+        return SQLiteResultCache(config['RESULT_CACHE_PATH'], maxsize=maxsize, ttl=ttl)
+    if backend == 'memory':
+        return MemoryResultCache(maxsize=maxsize, ttl=ttl)
+    return None
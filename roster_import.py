@@ -0,0 +1,189 @@
+"""
+Importação em massa da lista de estudantes com o quiz inicial.
+
+Lê um CSV (colunas name, email, grade_level e, opcionalmente, quiz_answers
+com o JSON das respostas) ou um JSONL (um objeto por linha com as mesmas
+chaves) sem carregar o arquivo inteiro. Os perfis de aprendizagem são
+calculados em um pool de processos e cada lote de estudantes e resultados de
+quiz é gravado em uma única transação.
+
+Depois de cada lote, um checkpoint registra quantas linhas já foram
+processadas; rodar a importação de novo com o mesmo arquivo continua de onde
+parou. E-mails já cadastrados são ignorados, então repetir um lote é seguro.
+"""
+import csv
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+from src import json_codec
+from src.ai_engine import AdaptiveLearningEngine
+from src.models.student import db, Student, QuizResult, insert_all
+
+REQUIRED_FIELDS = ('name', 'email', 'grade_level')
+MAX_REPORTED_ERRORS = 100
+
+_worker_engine = None
+
+
+def _init_worker():
+    global _worker_engine
+    _worker_engine = AdaptiveLearningEngine()
+
+
+def _analyze_profiles(answer_sets):
+    """Executado nos processos do pool: perfis de uma fatia do lote"""
+    return _worker_engine.analyze_learning_profiles(answer_sets)
+
+
+def iter_roster(path):
+    """
+    Gera (número da linha, registro) a partir de um CSV ou JSONL. No JSONL o
+    registro é a linha ainda não decodificada (validada em _parse_row).
+    """
+    with open(path, encoding='utf-8', newline='') as source:
+        if path.lower().endswith('.jsonl'):
+            for line_number, line in enumerate(source, 1):
+                if line.strip():
+                    yield line_number, line
+        else:
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+
+
+def _parse_row(row):
+    """Valida uma linha e devolve (estudante, respostas do quiz ou None)"""
+    if isinstance(row, str):
+        row = json_codec.loads(row)
+        if not isinstance(row, dict):
+            raise ValueError('cada linha do JSONL deve ser um objeto')
+    missing = [field for field in REQUIRED_FIELDS if not str(row.get(field) or '').strip()]
+    if missing:
+        raise ValueError(f'campos obrigatórios ausentes: {", ".join(missing)}')
+
+    answers = row.get('quiz_answers')
+    if isinstance(answers, str):
+        answers = json_codec.loads(answers) if answers.strip() else None
+    if answers is not None and not isinstance(answers, dict):
+        raise ValueError('quiz_answers deve ser um objeto JSON')
+
+    student = {field: str(row[field]).strip() for field in REQUIRED_FIELDS}
+    student['email'] = student['email'].lower()
+    return student, answers
+
+
+def fingerprint(path, sample_size=64 * 1024):
+    """Identifica o arquivo (tamanho e início do conteúdo) para validar o checkpoint"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        digest.update(source.read(sample_size))
+    return f'{os.path.getsize(path)}:{digest.hexdigest()}'
+
+
+def load_checkpoint(checkpoint_path, source_fingerprint):
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, encoding='utf-8') as checkpoint:
+        state = json_codec.loads(checkpoint.read())
+    return state if state.get('fingerprint') == source_fingerprint else None
+
+
+def save_checkpoint(checkpoint_path, state):
+    partial = f'{checkpoint_path}.tmp'
+    with open(partial, 'w', encoding='utf-8') as checkpoint:
+        checkpoint.write(json_codec.dumps(state))
+    os.replace(partial, checkpoint_path)
+
+
+def _insert_batch(rows, profiles, report):
+    """Grava um lote de estudantes (e quizzes) em uma transação"""
+    emails = [student['email'] for _, student, _ in rows]
+    existing = {
+        email for (email,) in db.session.query(Student.email).filter(Student.email.in_(emails))
+    }
+
+    students, quizzes = [], []
+    for (_, student_fields, answers), profile in zip(rows, profiles):
+        if student_fields['email'] in existing:
+            report['skipped'] += 1
+            continue
+        existing.add(student_fields['email'])
+
+        student = Student(**student_fields)
+        if profile is not None:
+            student.set_learning_profile(profile)
+            quizzes.append((student, answers, profile))
+        students.append(student)
+
+    try:
+        insert_all(students)
+        quiz_results = []
+        for student, answers, profile in quizzes:
+            quiz_result = QuizResult(student_id=student.id, quiz_type='initial_profile')
+            quiz_result.set_answers(answers)
+            quiz_result.set_results(profile)
+            quiz_results.append(quiz_result)
+        insert_all(quiz_results)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    report['imported'] += len(students)
+    report['quizzes'] += len(quizzes)
+
+
+def import_roster(path, batch_size=500, workers=None, checkpoint_path=None):
+    """
+    Importa o arquivo em lotes. É um gerador: após cada lote gravado, produz
+    o relatório de progresso acumulado (o último é o relatório final).
+
+    Relatório: rows (linhas processadas), imported, quizzes, skipped (e-mails
+    já cadastrados), failed, errors (até MAX_REPORTED_ERRORS), resumed_from
+    """
+    checkpoint_path = checkpoint_path or f'{path}.checkpoint'
+    source_fingerprint = fingerprint(path)
+    state = load_checkpoint(checkpoint_path, source_fingerprint)
+    report = state['report'] if state else {
+        'rows': 0, 'imported': 0, 'quizzes': 0, 'skipped': 0, 'failed': 0, 'errors': []
+    }
+    report['resumed_from'] = report['rows']
+    resume_after = report['rows']
+
+    def flush(batch, pool):
+        if batch:
+            answer_sets = [answers for _, _, answers in batch if answers is not None]
+            chunk = max(1, len(answer_sets) // ((workers or os.cpu_count() or 1) * 4))
+            computed = chain.from_iterable(pool.map(_analyze_profiles, [
+                answer_sets[i:i + chunk] for i in range(0, len(answer_sets), chunk)
+            ]))
+            profiles = [None if answers is None else next(computed) for _, _, answers in batch]
+            _insert_batch(batch, profiles, report)
+        save_checkpoint(checkpoint_path, {'fingerprint': source_fingerprint, 'report': report})
+
+    batch, rows_in_batch = [], 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for index, (line, row) in enumerate(iter_roster(path)):
+            if index < resume_after:
+                continue
+            rows_in_batch += 1
+            try:
+                student, answers = _parse_row(row)
+                batch.append((line, student, answers))
+            except ValueError as e:
+                report['failed'] += 1
+                if len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append({'line': line, 'error': str(e)})
+
+            if rows_in_batch >= batch_size:
+                report['rows'] += rows_in_batch
+                flush(batch, pool)
+                batch, rows_in_batch = [], 0
+                yield dict(report)
+
+        if rows_in_batch:
+            report['rows'] += rows_in_batch
+            flush(batch, pool)
+        yield dict(report)
@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# Perfil de produção para o SQLite: WAL permite leitores e um escritor ao mesmo
+# tempo, e synchronous=NORMAL é seguro em WAL (só o último commit pode se
+# perder em uma queda de energia, sem corromper o banco).
+SQLITE_PRODUCTION_PROFILE = {
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,
+    'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,
+    'SQLITE_CACHE_SIZE': -64 * 1024,  # negativo = KiB (64 MiB)
+    'SQLITE_POOL_SIZE': 10,
+    'SQLITE_MAX_OVERFLOW': 20,
+    'SQLITE_POOL_TIMEOUT': 30
+}
+
+_sqlite_settings = {}
+
+
+def apply_sqlite_pragmas(connection, settings):
+    """Aplica os PRAGMAs do perfil em uma conexão DB-API do sqlite3"""
+    cursor = connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings['SQLITE_JOURNAL_MODE']}")
+    cursor.execute(f"PRAGMA synchronous={settings['SQLITE_SYNCHRONOUS']}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings['SQLITE_BUSY_TIMEOUT_MS'])}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings['SQLITE_MMAP_SIZE'])}")
+    cursor.execute(f"PRAGMA cache_size={int(settings['SQLITE_CACHE_SIZE'])}")
+    cursor.close()
+
+
+@event.listens_for(Engine, 'connect')
+def _on_connect(dbapi_connection, connection_record):
+    if _sqlite_settings and isinstance(dbapi_connection, sqlite3.Connection):
+        apply_sqlite_pragmas(dbapi_connection, _sqlite_settings)
+
+
+def configure_sqlite_storage(app):
+    """
+    Aplica o perfil de armazenamento definido em STORAGE_PROFILE ('production'
+    ou 'default'). Deve ser chamado antes de db.init_app(app). Cada chave do
+    perfil pode ser sobrescrita em app.config.
+    """
+    if app.config.get('STORAGE_PROFILE', 'production') != 'production':
+        return None
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return None
+
+    for key, value in SQLITE_PRODUCTION_PROFILE.items():
+        app.config.setdefault(key, value)
+    _sqlite_settings.clear()
+    _sqlite_settings.update({key: app.config[key] for key in SQLITE_PRODUCTION_PROFILE})
+
+    engine_options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    engine_options.setdefault('poolclass', QueuePool)
+    engine_options.setdefault('pool_size', app.config['SQLITE_POOL_SIZE'])
+    engine_options.setdefault('max_overflow', app.config['SQLITE_MAX_OVERFLOW'])
+    engine_options.setdefault('pool_timeout', app.config['SQLITE_POOL_TIMEOUT'])
+    engine_options.setdefault('pool_pre_ping', True)
+    connect_args = engine_options.setdefault('connect_args', {})
+    # O pool compartilha conexões entre as threads do servidor
+    connect_args.setdefault('check_same_thread', False)
+    connect_args.setdefault('timeout', app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000)
+    return _sqlite_settings
+
+
+def measure_writer_stall(settings=None, writes=50, reader_hold=0.5):
+    """
+    Mede o pior tempo de commit de um escritor enquanto um leitor mantém uma
+    transação de leitura longa aberta (como uma análise pesada). Usa um banco
+    temporário. Com settings=None, usa o modo padrão do SQLite (rollback journal).
+
+    Returns:
+        Dicionário com o pior e o tempo médio de commit (segundos) e o número
+        de escritas que falharam por bloqueio
+    """
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'concurrency.db')
+
+    def connect():
+        connection = sqlite3.connect(path, timeout=reader_hold * 4, check_same_thread=False)
+        if settings:
+            apply_sqlite_pragmas(connection, settings)
+        return connection
+
+    setup = connect()
+    setup.execute('CREATE TABLE game_sessions (id INTEGER PRIMARY KEY, score REAL)')
+    setup.executemany('INSERT INTO game_sessions (score) VALUES (?)', [(0.5,)] * 1000)
+    setup.commit()
+    setup.close()
+
+    reader_ready = threading.Event()
+    stop = threading.Event()
+
+    def reader():
+        connection = connect()
+        while not stop.is_set():
+            connection.execute('BEGIN')
+            connection.execute('SELECT SUM(score) FROM game_sessions').fetchone()
+            reader_ready.set()
+            time.sleep(reader_hold)  # transação de leitura aberta
+            connection.execute('COMMIT')
+        connection.close()
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    reader_ready.wait()
+
+    writer = connect()
+    latencies, failures = [], 0
+    for _ in range(writes):
+        start = time.perf_counter()
+        try:
+            writer.execute('INSERT INTO game_sessions (score) VALUES (0.8)')
+            writer.commit()
+        except sqlite3.OperationalError:
+            writer.rollback()
+            failures += 1
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+    stop.set()
+    thread.join()
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+
+    return {
+        'max_commit_seconds': max(latencies),
+        'avg_commit_seconds': sum(latencies) / len(latencies),
+        'failed_writes': failures
+    }
@@ -1,9 +1,77 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from datetime import datetime
-import json
+from collections import OrderedDict
+import threading
+from src import json_codec
+from src.metrics import timer
+from src import column_codec
+from src.column_codec import LazyColumns
 
 db = SQLAlchemy()
 
+class ProfileCache:
+    """
+    Cache LRU limitado dos perfis de aprendizagem já decodificados. A entrada de
+    cada estudante guarda a versão do perfil (updated_at) e o texto de origem,
+    então um perfil alterado nunca é servido a partir do cache.
+    """
+    
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, student_id, version, raw):
+        with self._lock:
+            entry = self._entries.get(student_id)
+            if entry is not None and entry[0] == version and entry[1] == raw:
+                self._entries.move_to_end(student_id)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            return None
+    
+    def put(self, student_id, version, raw, profile):
+        with self._lock:
+            self._entries[student_id] = (version, raw, profile)
+            self._entries.move_to_end(student_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, student_id):
+        """Remove o perfil de um estudante (id None, de estudante ainda não gravado, é ignorado)"""
+        if student_id is None:
+            return
+        with self._lock:
+            self._entries.pop(student_id, None)
+    
+    def clear(self):
+        """Remove todos os perfis"""
+        with self._lock:
+            self._entries.clear()
+    
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+profile_cache = ProfileCache()
+
 class Student(db.Model):
     __tablename__ = 'students'
     
@@ -23,14 +91,26 @@ class Student(db.Model):
         return f'<Student {self.name}>'
     
     def get_learning_profile(self):
-        """Retorna o perfil de aprendizagem como dicionário"""
-        if self.learning_profile:
-            return json.loads(self.learning_profile)
-        return {}
+        """
+        Retorna o perfil de aprendizagem como dicionário (compartilhado pelo
+        cache: tratar como somente leitura)
+        """
+        if not self.learning_profile:
+            return {}
+        
+        profile = profile_cache.get(self.id, self.updated_at, self.learning_profile)
+        if profile is None:
+            with timer('json.learning_profile'):
+                profile = json_codec.loads(self.learning_profile)
+            if self.id is not None:
+                profile_cache.put(self.id, self.updated_at, self.learning_profile, profile)
+        return profile
     
     def set_learning_profile(self, profile_dict):
         """Define o perfil de aprendizagem a partir de um dicionário"""
-        self.learning_profile = json.dumps(profile_dict)
+        self.learning_profile = json_codec.dumps(profile_dict)
+        if self.id is not None:
+            profile_cache.invalidate(self.id)
     
     def to_dict(self):
         return {
@@ -43,7 +123,45 @@ class Student(db.Model):
             'updated_at': self.updated_at.isoformat()
         }
 
-class GameSession(db.Model):
+class SessionRecord:
+    """
+    Registro somente leitura de uma sessão de jogo, com as colunas escalares
+    usadas pelo motor adaptativo e pelas análises. É montado direto das
+    colunas, sem mapa de identidade nem rastreamento de alterações, e pode ser
+    usado no lugar de GameSession em qualquer caminho só de leitura.
+    """
+    __slots__ = (
+        'id', 'student_id', 'game_type', 'difficulty_level',
+        'score', 'time_spent', 'completed', 'created_at'
+    )
+    
+    def __init__(self, id=None, student_id=None, game_type=None, difficulty_level=None,
+                 score=None, time_spent=None, completed=None, created_at=None):
+        self.id = id
+        self.student_id = student_id
+        self.game_type = game_type
+        self.difficulty_level = difficulty_level
+        self.score = score
+        self.time_spent = time_spent
+        self.completed = completed
+        self.created_at = created_at
+    
+    def __repr__(self):
+        return f'<SessionRecord {self.game_type} - Level {self.difficulty_level}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'student_id': self.student_id,
+            'game_type': self.game_type,
+            'difficulty_level': self.difficulty_level,
+            'score': self.score,
+            'time_spent': self.time_spent,
+            'completed': self.completed,
+            'created_at': self.created_at.isoformat()
+        }
+
+class GameSession(LazyColumns, db.Model):
     __tablename__ = 'game_sessions'
     
     id = db.Column(db.Integer, primary_key=True)
@@ -53,24 +171,137 @@ class GameSession(db.Model):
     score = db.Column(db.Float, nullable=False)
     time_spent = db.Column(db.Integer, nullable=False)  # em segundos
     completed = db.Column(db.Boolean, default=False)
-    session_data = db.Column(db.Text)  # JSON com dados específicos da sessão
+    session_data = db.Column(db.Text)  # dados específicos da sessão (ver src.column_codec)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
         return f'<GameSession {self.game_type} - Level {self.difficulty_level}>'
     
+    @classmethod
+    def record_columns(cls):
+        """Colunas de SessionRecord, na ordem dos seus campos"""
+        return tuple(getattr(cls, name) for name in SessionRecord.__slots__)
+    
+    @classmethod
+    def records(cls, query):
+        """Executa uma consulta de GameSession trazendo apenas as colunas de SessionRecord"""
+        return [SessionRecord(*row) for row in query.with_entities(*cls.record_columns())]
+    
+    @classmethod
+    def recent_query(cls, student_id, game_type=None, limit=5):
+        """Sessões mais recentes do estudante (usa os índices por estudante/jogo/data)"""
+        query = cls.query.filter_by(student_id=student_id)
+        if game_type:
+            query = query.filter_by(game_type=game_type)
+        return query.order_by(cls.created_at.desc()).limit(limit)
+    
+    @classmethod
+    def history_query(cls, student_id, ascending=False):
+        """Histórico completo do estudante ordenado por data"""
+        order = cls.created_at.asc() if ascending else cls.created_at.desc()
+        return cls.query.filter_by(student_id=student_id).order_by(order)
+    
+    @classmethod
+    def page_query(cls, student_id, game_type=None, after=None):
+        """
+        Histórico do estudante paginado por chave (created_at, id), da sessão
+        mais recente para a mais antiga. `after` é o (created_at, id) da última
+        sessão da página anterior.
+        """
+        query = cls.query.filter(cls.student_id == student_id)
+        if game_type:
+            query = query.filter(cls.game_type == game_type)
+        if after is not None:
+            created_at, session_id = after
+            query = query.filter(db.or_(
+                cls.created_at < created_at,
+                db.and_(cls.created_at == created_at, cls.id < session_id)
+            ))
+        return query.order_by(cls.created_at.desc(), cls.id.desc())
+    
+    @classmethod
+    def last_id(cls, student_id):
+        """ID da sessão mais recente registrada para o estudante"""
+        return db.session.query(db.func.max(cls.id)).filter(cls.student_id == student_id).scalar()
+    
+    @classmethod
+    def analytics_rows_query(cls, student_id, since=None):
+        """
+        Somente as colunas usadas nas análises, em ordem cronológica, sem
+        materializar objetos ORM
+        """
+        query = db.session.query(
+            cls.game_type, cls.score, cls.difficulty_level,
+            cls.time_spent, cls.completed, cls.created_at
+        ).filter(cls.student_id == student_id)
+        if since is not None:
+            query = query.filter(cls.created_at >= since)
+        return query.order_by(cls.created_at.asc())
+    
+    @classmethod
+    def first_scores_sum(cls, student_id, count):
+        """Soma das pontuações das primeiras `count` sessões do estudante"""
+        first = db.session.query(cls.score).filter(
+            cls.student_id == student_id
+        ).order_by(cls.created_at.asc()).limit(count).subquery()
+        return db.session.query(db.func.sum(first.c.score)).scalar() or 0.0
+    
+    @classmethod
+    def recent_by_game_query(cls, student_id, limit=5):
+        """
+        Colunas de SessionRecord das sessões mais recentes do estudante para
+        cada tipo de jogo em uma única consulta (ROW_NUMBER particionado por
+        estudante e jogo). Com student_id=None, considera todos os estudantes.
+        """
+        criteria = [cls.student_id == student_id] if student_id is not None else []
+        
+        # IN em vez de JOIN: com o filtro por estudante, a consulta externa lê
+        # o índice (student_id, game_type, created_at) já na ordem pedida
+        return db.session.query(*cls.record_columns()).filter(
+            cls.id.in_(cls._recent_ids_query(limit, *criteria)), *criteria
+        ).order_by(cls.student_id, cls.game_type, cls.created_at.desc())
+    
+    @classmethod
+    def recent_by_game_records(cls, student_id, limit=5):
+        """Lista de SessionRecord de recent_by_game_query"""
+        return [SessionRecord(*row) for row in cls.recent_by_game_query(student_id, limit)]
+    
+    @classmethod
+    def recent_by_pairs_records(cls, pairs, limit=5):
+        """
+        SessionRecord das `limit` sessões mais recentes de cada par
+        (student_id, game_type) em uma única consulta, mais recente primeiro
+        """
+        pair_filter = db.tuple_(cls.student_id, cls.game_type).in_(list(pairs))
+        query = db.session.query(*cls.record_columns()).filter(
+            cls.id.in_(cls._recent_ids_query(limit, pair_filter))
+        ).order_by(cls.student_id, cls.game_type, cls.created_at.desc())
+        return [SessionRecord(*row) for row in query]
+    
+    @classmethod
+    def _recent_ids_query(cls, limit, *criteria):
+        """Ids das `limit` sessões mais recentes de cada (estudante, jogo) que atendem aos critérios"""
+        ranked = db.session.query(
+            cls.id.label('id'),
+            db.func.row_number().over(
+                partition_by=(cls.student_id, cls.game_type),
+                order_by=cls.created_at.desc()
+            ).label('rn')
+        ).filter(*criteria).subquery()
+        return db.session.query(ranked.c.id).filter(ranked.c.rn <= limit)
+    
     def get_session_data(self):
-        """Retorna os dados da sessão como dicionário"""
+        """Retorna os dados da sessão como dicionário (decodificados no primeiro acesso)"""
         if self.session_data:
-            return json.loads(self.session_data)
+            return self._decoded('session_data')
         return {}
     
     def set_session_data(self, data_dict):
         """Define os dados da sessão a partir de um dicionário"""
-        self.session_data = json.dumps(data_dict)
+        self._encode('session_data', data_dict)
     
-    def to_dict(self):
-        return {
+    def to_dict(self, include_session_data=True):
+        data = {
             'id': self.id,
             'student_id': self.student_id,
             'game_type': self.game_type,
@@ -78,18 +309,359 @@ class GameSession(db.Model):
             'score': self.score,
             'time_spent': self.time_spent,
             'completed': self.completed,
-            'session_data': self.get_session_data(),
             'created_at': self.created_at.isoformat()
         }
+        if include_session_data:
+            data['session_data'] = self.get_session_data()
+        return data
+
+# Índices compostos para os caminhos quentes (filtro por estudante, ordenação por data).
+# O id no fim do índice por jogo cobre o desempate de page_query sem ordenação em memória.
+db.Index(
+    'ix_game_sessions_student_game_created_id',
+    GameSession.student_id, GameSession.game_type, GameSession.created_at.desc(), GameSession.id.desc()
+)
+db.Index(
+    'ix_game_sessions_student_created',
+    GameSession.student_id, GameSession.created_at
+)
 
-class QuizResult(db.Model):
+def insert_all(objects, chunk_size=500):
+    """
+    Insere objetos novos de um mesmo modelo com um INSERT de várias linhas por
+    bloco (o flush do ORM faz um INSERT por objeto no SQLite) e preenche o id
+    de cada um. Os objetos inseridos não ficam associados à sessão do ORM.
+    """
+    if not objects:
+        return
+    model = type(objects[0])
+    columns = [column for column in model.__table__.columns if not column.primary_key]
+    for start in range(0, len(objects), chunk_size):
+        chunk = objects[start:start + chunk_size]
+        rows = []
+        for obj in chunk:
+            row = {}
+            for column in columns:
+                value = getattr(obj, column.key)
+                if value is None and column.default is not None:
+                    value = column.default.arg(None) if column.default.is_callable else column.default.arg
+                    setattr(obj, column.key, value)
+                row[column.key] = value
+            rows.append(row)
+        result = db.session.execute(db.insert(model).values(rows).returning(model.id))
+        # Num único INSERT o SQLite atribui rowids crescentes na ordem das
+        # linhas, mas não garante a ordem das linhas do RETURNING
+        for obj, object_id in zip(chunk, sorted(object_id for (object_id,) in result)):
+            obj.id = object_id
+
+# Índices de versões anteriores, substituídos pelos definidos acima
+_REPLACED_INDEXES = ('ix_game_sessions_student_game_created',)
+
+def migrate_indexes(engine=None):
+    """
+    Cria os índices que faltarem em bancos existentes (ex.: app.db antigo),
+    já que db.create_all() não altera tabelas já criadas, e remove os que
+    foram substituídos.
+    """
+    engine = engine or db.engine
+    for index in GameSession.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    with engine.begin() as connection:
+        for name in _REPLACED_INDEXES:
+            connection.execute(db.text(f'DROP INDEX IF EXISTS {name}'))
+
+def _explain(query, engine):
+    """Retorna o EXPLAIN QUERY PLAN (SQLite) de uma consulta"""
+    compiled = query.statement.compile(
+        dialect=engine.dialect, compile_kwargs={'literal_binds': True}
+    )
+    with engine.connect() as connection:
+        rows = connection.execute(db.text(f'EXPLAIN QUERY PLAN {compiled}')).fetchall()
+    return [row[-1] for row in rows]
+
+def find_table_scans(engine=None):
+    """
+    Verifica os planos das consultas dos caminhos quentes e retorna as que
+    fazem varredura completa de game_sessions ou ordenação em memória
+    (USE TEMP B-TREE).
+    """
+    engine = engine or db.engine
+    hot_paths = {
+        'recent_sessions': GameSession.recent_query(1, 'math'),
+        'recent_sessions_any_game': GameSession.recent_query(1),
+        'recent_by_game': GameSession.recent_by_game_query(1),
+        'history_desc': GameSession.history_query(1),
+        'history_asc': GameSession.history_query(1, ascending=True),
+        'student_progress_page': GameSession.page_query(1, after=(datetime(2024, 1, 1), 1)),
+        'student_progress_page_by_game': GameSession.page_query(1, 'math', after=(datetime(2024, 1, 1), 1)),
+        'learning_analytics': GameSession.analytics_rows_query(1, since=datetime(2024, 1, 1)),
+    }
+    
+    offenders = {}
+    for name, query in hot_paths.items():
+        plan = _explain(query, engine)
+        for detail in plan:
+            full_scan = detail.startswith('SCAN') and 'game_sessions' in detail and 'INDEX' not in detail
+            if full_scan or detail.startswith('USE TEMP B-TREE'):
+                offenders[name] = plan
+                break
+    return offenders
+
+class StudentGameStats(db.Model):
+    """Agregado por estudante e tipo de jogo, mantido a cada sessão registrada"""
+    __tablename__ = 'student_game_stats'
+    
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), primary_key=True)
+    game_type = db.Column(db.String(50), primary_key=True)
+    sessions_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0.0)
+    difficulty_sum = db.Column(db.Integer, nullable=False, default=0)
+    total_time = db.Column(db.Integer, nullable=False, default=0)  # em segundos
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+    last_played = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<StudentGameStats {self.student_id} - {self.game_type}>'
+    
+    @classmethod
+    def record_sessions(cls, sessions, chunk_size=500):
+        """
+        Acumula sessões nos agregados com um único INSERT ... ON CONFLICT DO
+        UPDATE para todos os pares (estudante, jogo) envolvidos, existam eles
+        ou não. Deve ser chamado antes do commit das sessões para que tudo
+        fique na mesma transação.
+        
+        Returns:
+            Número de pares atualizados
+        """
+        deltas = {}
+        for session in sessions:
+            if session.created_at is None:
+                session.created_at = datetime.utcnow()
+            delta = deltas.setdefault((session.student_id, session.game_type), {
+                'student_id': session.student_id,
+                'game_type': session.game_type,
+                'sessions_count': 0,
+                'score_sum': 0.0,
+                'difficulty_sum': 0,
+                'total_time': 0,
+                'completed_count': 0,
+                'last_played': session.created_at
+            })
+            delta['sessions_count'] += 1
+            delta['score_sum'] += session.score
+            delta['difficulty_sum'] += session.difficulty_level
+            delta['total_time'] += session.time_spent
+            delta['completed_count'] += 1 if session.completed else 0
+            delta['last_played'] = max(delta['last_played'], session.created_at)
+        
+        rows = list(deltas.values())
+        for start in range(0, len(rows), chunk_size):
+            insert = sqlite_insert(cls).values(rows[start:start + chunk_size])
+            excluded = insert.excluded
+            db.session.execute(insert.on_conflict_do_update(
+                index_elements=[cls.student_id, cls.game_type],
+                set_={
+                    'sessions_count': cls.sessions_count + excluded.sessions_count,
+                    'score_sum': cls.score_sum + excluded.score_sum,
+                    'difficulty_sum': cls.difficulty_sum + excluded.difficulty_sum,
+                    'total_time': cls.total_time + excluded.total_time,
+                    'completed_count': cls.completed_count + excluded.completed_count,
+                    'last_played': db.func.max(
+                        db.func.coalesce(cls.last_played, excluded.last_played), excluded.last_played
+                    )
+                }
+            ))
+        return len(rows)
+    
+    @property
+    def avg_score(self):
+        return self.score_sum / self.sessions_count if self.sessions_count else 0
+    
+    @property
+    def avg_difficulty(self):
+        return self.difficulty_sum / self.sessions_count if self.sessions_count else 0
+    
+    @property
+    def completion_rate(self):
+        return self.completed_count / self.sessions_count if self.sessions_count else 0
+    
+    @classmethod
+    def for_student(cls, student_id):
+        return cls.query.filter_by(student_id=student_id).all()
+    
+    def to_dict(self):
+        return {
+            'student_id': self.student_id,
+            'game_type': self.game_type,
+            'sessions_count': self.sessions_count,
+            'avg_score': self.avg_score,
+            'avg_difficulty': self.avg_difficulty,
+            'total_time': self.total_time,
+            'completion_rate': self.completion_rate,
+            'last_played': self.last_played.isoformat() if self.last_played else None
+        }
+
+class DifficultyState(db.Model):
+    """
+    Estado da dificuldade adaptativa por estudante e tipo de jogo: janela das
+    sessões mais recentes e a próxima dificuldade já calculada.
+    """
+    __tablename__ = 'difficulty_states'
+    
+    window_size = 5
+    
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), primary_key=True)
+    game_type = db.Column(db.String(50), primary_key=True)
+    window = db.Column(db.Text, nullable=False, default='[]')  # JSON, mais recente primeiro
+    next_difficulty = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DifficultyState {self.student_id} - {self.game_type}: {self.next_difficulty}>'
+    
+    def get_window(self):
+        """Retorna a janela de sessões recentes (mais recente primeiro)"""
+        return [
+            SessionRecord(
+                student_id=self.student_id, game_type=self.game_type,
+                difficulty_level=difficulty_level, score=score, time_spent=time_spent,
+                created_at=datetime.fromisoformat(created_at)
+            )
+            for score, time_spent, difficulty_level, created_at in json_codec.loads(self.window or '[]')
+        ]
+    
+    def set_window(self, sessions):
+        """Define a janela a partir de sessões ordenadas da mais recente para a mais antiga"""
+        self.window = json_codec.dumps([
+            [s.score, s.time_spent, s.difficulty_level, s.created_at.isoformat()]
+            for s in sessions[:self.window_size]
+        ])
+    
+    def push(self, *sessions):
+        """Insere novas sessões na janela, mantendo apenas as mais recentes"""
+        window = self.get_window() + list(sessions)
+        window.sort(key=lambda s: s.created_at, reverse=True)
+        self.set_window(window)
+        return self.get_window()
+    
+    @classmethod
+    def windows_for_pairs(cls, pairs):
+        """
+        Janelas (sessões já gravadas, mais recente primeiro) dos pares
+        (estudante, jogo) em uma única consulta a game_sessions, de onde os
+        estados são derivados. Deve ser chamado antes de as novas sessões
+        serem inseridas.
+        """
+        windows = {pair: [] for pair in pairs}
+        if windows:
+            for record in GameSession.recent_by_pairs_records(windows, cls.window_size):
+                windows[(record.student_id, record.game_type)].append(record)
+        return windows
+    
+    @classmethod
+    def save_all(cls, states, chunk_size=500):
+        """Grava (insere ou substitui) os estados com um único INSERT ... ON CONFLICT"""
+        now = datetime.utcnow()
+        rows = [
+            {
+                'student_id': state.student_id,
+                'game_type': state.game_type,
+                'window': state.window,
+                'next_difficulty': state.next_difficulty,
+                'updated_at': now
+            }
+            for state in states
+        ]
+        for start in range(0, len(rows), chunk_size):
+            insert = sqlite_insert(cls).values(rows[start:start + chunk_size])
+            db.session.execute(insert.on_conflict_do_update(
+                index_elements=[cls.student_id, cls.game_type],
+                set_={
+                    'window': insert.excluded.window,
+                    'next_difficulty': insert.excluded.next_difficulty,
+                    'updated_at': insert.excluded.updated_at
+                }
+            ))
+
+def _aggregate_game_sessions():
+    """Recalcula os agregados diretamente de game_sessions (GROUP BY)"""
+    return db.session.query(
+        GameSession.student_id,
+        GameSession.game_type,
+        db.func.count(GameSession.id),
+        db.func.sum(GameSession.score),
+        db.func.sum(GameSession.difficulty_level),
+        db.func.sum(GameSession.time_spent),
+        db.func.sum(db.case((GameSession.completed == True, 1), else_=0)),
+        db.func.max(GameSession.created_at)
+    ).group_by(GameSession.student_id, GameSession.game_type).all()
+
+def rebuild_game_stats():
+    """Reconstrói student_game_stats a partir de game_sessions (backfill)"""
+    StudentGameStats.query.delete()
+    rows = _aggregate_game_sessions()
+    db.session.bulk_insert_mappings(StudentGameStats, [
+        {
+            'student_id': student_id,
+            'game_type': game_type,
+            'sessions_count': count,
+            'score_sum': score_sum or 0.0,
+            'difficulty_sum': difficulty_sum or 0,
+            'total_time': total_time or 0,
+            'completed_count': completed_count or 0,
+            'last_played': last_played
+        }
+        for student_id, game_type, count, score_sum, difficulty_sum,
+            total_time, completed_count, last_played in rows
+    ])
+    db.session.commit()
+    return len(rows)
+
+def backfill_game_stats():
+    """
+    Preenche student_game_stats em bancos existentes (ex.: app.db anterior ao
+    agregado), onde a tabela foi criada vazia mas game_sessions já tem dados.
+    Retorna o número de agregados criados (0 se nada precisou ser feito).
+    """
+    if StudentGameStats.query.first() is not None or GameSession.query.first() is None:
+        return 0
+    return rebuild_game_stats()
+
+def verify_game_stats(tolerance=1e-6):
+    """Compara student_game_stats com game_sessions e retorna as divergências"""
+    expected = {
+        (row[0], row[1]): row[2:] for row in _aggregate_game_sessions()
+    }
+    stored = {
+        (stats.student_id, stats.game_type): (
+            stats.sessions_count, stats.score_sum, stats.difficulty_sum,
+            stats.total_time, stats.completed_count, stats.last_played
+        )
+        for stats in StudentGameStats.query.all()
+    }
+    
+    mismatches = []
+    for key in set(expected) | set(stored):
+        exp, got = expected.get(key), stored.get(key)
+        if exp is None or got is None:
+            mismatches.append((key, exp, got))
+            continue
+        count, score_sum, difficulty_sum, total_time, completed_count, last_played = exp
+        if (count != got[0] or abs((score_sum or 0.0) - got[1]) > tolerance
+                or (difficulty_sum or 0) != got[2] or (total_time or 0) != got[3]
+                or (completed_count or 0) != got[4] or last_played != got[5]):
+            mismatches.append((key, exp, got))
+    return mismatches
+
+class QuizResult(LazyColumns, db.Model):
     __tablename__ = 'quiz_results'
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
     quiz_type = db.Column(db.String(50), nullable=False)  # Ex: "initial_profile", "subject_assessment"
-    answers = db.Column(db.Text, nullable=False)  # JSON com respostas
-    results = db.Column(db.Text, nullable=False)  # JSON com resultados processados
+    answers = db.Column(db.Text, nullable=False)  # respostas (ver src.column_codec)
+    results = db.Column(db.Text, nullable=False)  # resultados processados (ver src.column_codec)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
@@ -97,19 +669,19 @@ class QuizResult(db.Model):
     
     def get_answers(self):
         """Retorna as respostas como dicionário"""
-        return json.loads(self.answers)
+        return self._decoded('answers')
     
     def set_answers(self, answers_dict):
         """Define as respostas a partir de um dicionário"""
-        self.answers = json.dumps(answers_dict)
+        self._encode('answers', answers_dict)
     
     def get_results(self):
         """Retorna os resultados como dicionário"""
-        return json.loads(self.results)
+        return self._decoded('results')
     
     def set_results(self, results_dict):
         """Define os resultados a partir de um dicionário"""
-        self.results = json.dumps(results_dict)
+        self._encode('results', results_dict)
     
     def to_dict(self):
         return {
@@ -121,3 +693,46 @@ class QuizResult(db.Model):
             'created_at': self.created_at.isoformat()
         }
 
+def reencode_json_columns(codec, batch_size=1000, compress_threshold=None):
+    """
+    Regrava session_data (game_sessions) e answers/results (quiz_results) no
+    formato `codec` ('json' ou 'msgpack'), em lotes ordenados por id, com um
+    commit por lote. Valores maiores que `compress_threshold` bytes são
+    comprimidos com zlib (None grava sem compressão, o que devolve colunas
+    'json' comprimidas ao texto puro). Valores já no formato desejado não são
+    regravados.
+    
+    Returns:
+        Dicionário tabela -> número de linhas regravadas
+    """
+    rewritten = {}
+    for model, columns in ((GameSession, ('session_data',)), (QuizResult, ('answers', 'results'))):
+        count, last_id = 0, 0
+        while True:
+            rows = db.session.query(
+                model.id, *(getattr(model, column) for column in columns)
+            ).filter(model.id > last_id).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            
+            updates = []
+            for row in rows:
+                changes = {}
+                for column, raw in zip(columns, row[1:]):
+                    if raw is None:
+                        continue
+                    encoded = column_codec.encode(column_codec.decode(raw), codec, compress_threshold)
+                    if encoded != raw:
+                        changes[column] = encoded
+                if changes:
+                    changes['id'] = row[0]
+                    updates.append(changes)
+            
+            if updates:
+                db.session.bulk_update_mappings(model, updates)
+            db.session.commit()
+            count += len(updates)
+            last_id = rows[-1][0]
+        rewritten[model.__tablename__] = count
+    return rewritten
+
@@ -0,0 +1,282 @@
+import atexit
+import fcntl
+import glob
+import logging
+import os
+import queue
+import threading
+import time
+
+from src import json_codec
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindFull(Exception):
+    """A fila de gravação está cheia; o cliente deve tentar novamente"""
+
+
+class SessionWriteBehind:
+    """
+    Fila de gravação assíncrona (write-behind) para sessões de jogo.
+
+    Cada sessão aceita é anexada a um arquivo de spool (JSON por linha) antes de
+    entrar na fila, então uma queda do processo não perde sessões aceitas: ao
+    reiniciar, as que ainda não foram gravadas são reenfileiradas. Uma thread
+    em segundo plano grava lotes de até `flush_size` sessões (ou o que chegar em
+    `flush_interval` segundos) em uma única transação, usando `persist`.
+
+    Cada processo (ex.: worker do gunicorn) tem o seu spool, com o pid no nome
+    (`session_spool.jsonl` -> `session_spool.<pid>.jsonl`), mantido sob um
+    flock exclusivo enquanto o processo vive. Ao iniciar, o processo assume os
+    spools sem dono (de processos encerrados) e reenfileira o que eles não
+    gravaram.
+
+    Sessões que continuam falhando depois das novas tentativas vão para um
+    arquivo de descarte (`<spool>.dead`) antes de o marcador avançar, e voltam
+    para a fila no próximo start().
+
+    A entrega é "pelo menos uma vez": uma queda entre o commit do lote e o
+    registro do marcador pode regravar esse lote ao reiniciar.
+    """
+
+    def __init__(self, app, persist, spool_path, max_queue=10000, flush_interval=1.0,
+                 flush_size=200, fsync=True, max_retries=3):
+        self.app = app
+        self.persist = persist
+        self.base_spool_path = spool_path
+        self.spool_path = None  # definido em start(), com o pid do processo
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.fsync = fsync
+        self.max_retries = max_retries
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._spool = None
+        self._last_seq = 0
+        self._committed_seq = 0
+        self._dead_lettered = 0
+
+    @property
+    def marker_path(self):
+        return self.spool_path + '.committed'
+
+    @property
+    def dead_letter_path(self):
+        return self.spool_path + '.dead'
+
+    def start(self):
+        """Reenfileira o que ficou no spool (e nos spools sem dono) e inicia a thread de gravação"""
+        directory = os.path.dirname(self.base_spool_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        root, ext = os.path.splitext(self.base_spool_path)
+        self.spool_path = f'{root}.{os.getpid()}{ext}'
+        self._spool = open(self.spool_path, 'a+', encoding='utf-8')
+        fcntl.flock(self._spool.fileno(), fcntl.LOCK_EX)
+
+        self._committed_seq = _read_marker(self.marker_path)
+        self._last_seq = self._committed_seq
+        self._spool.seek(0)
+        for seq, record in _read_spool(self._spool):
+            self._last_seq = max(self._last_seq, seq)
+            if seq > self._committed_seq:
+                self._queue.put((seq, record))
+        self._spool.seek(0, os.SEEK_END)
+
+        # Sessões descartadas antes e spools de processos encerrados voltam para a fila
+        self._requeue(_read_dead_letters(self.dead_letter_path))
+        _remove(self.dead_letter_path)
+        for path in [self.base_spool_path] + glob.glob(f'{glob.escape(root)}.*{ext}'):
+            if path != self.spool_path:
+                self._adopt(path)
+
+        self._thread = threading.Thread(target=self._run, name='session-write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self, timeout=10):
+        """Grava o que estiver na fila e encerra a thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+    def submit(self, record):
+        """
+        Aceita uma sessão (dicionário serializável em JSON). Lança
+        WriteBehindFull se a fila estiver cheia.
+        """
+        with self._lock:
+            if self._queue.qsize() >= self.max_queue:
+                raise WriteBehindFull()
+            seq = self._append([record])[0]
+        return seq
+
+    def stats(self):
+        return {
+            'spool_path': self.spool_path,
+            'queued': self._queue.qsize(),
+            'max_queue': self.max_queue,
+            'last_seq': self._last_seq,
+            'committed_seq': self._committed_seq,
+            'dead_lettered': self._dead_lettered
+        }
+
+    def _append(self, records):
+        """Anexa registros ao spool (com fsync) e à fila; retorna os seqs atribuídos"""
+        entries = []
+        for record in records:
+            self._last_seq += 1
+            entries.append((self._last_seq, record))
+        self._spool.write(''.join(json_codec.dumps([seq, record]) + '\n' for seq, record in entries))
+        self._spool.flush()
+        if self.fsync:
+            os.fsync(self._spool.fileno())
+        for entry in entries:
+            self._queue.put(entry)
+        return [seq for seq, _ in entries]
+
+    def _requeue(self, records):
+        if records:
+            with self._lock:
+                self._append(records)
+
+    def _adopt(self, path):
+        """Assume o spool de outro processo se ninguém mais tiver o lock dele"""
+        try:
+            orphan = open(path, 'r', encoding='utf-8')
+        except OSError:
+            return
+        with orphan:
+            try:
+                fcntl.flock(orphan.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return  # o processo dono ainda está vivo
+            if not os.path.exists(path):
+                return  # já assumido por outro processo
+
+            committed = _read_marker(path + '.committed')
+            records = [record for seq, record in _read_spool(orphan) if seq > committed]
+            records += _read_dead_letters(path + '.dead')
+            self._requeue(records)
+            if records:
+                logger.info('%d sessões de %s reenfileiradas', len(records), path)
+            # Remover antes de soltar o lock, para que nenhum outro processo o assuma de novo
+            for leftover in (path, path + '.committed', path + '.dead'):
+                _remove(leftover)
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+
+    def _next_batch(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        records = [record for _, record in batch]
+        for attempt in range(self.max_retries):
+            if self._persist(records):
+                break
+            time.sleep(self.flush_interval * (attempt + 1))
+        else:
+            # Isolar as sessões que continuam falhando para não travar a fila
+            failed = [(seq, record) for seq, record in batch if not self._persist([record])]
+            if failed:
+                self._dead_letter(failed)
+        self._mark_committed(batch[-1][0])
+
+    def _dead_letter(self, entries):
+        """Guarda sessões que não puderam ser gravadas (antes de o marcador passar por elas)"""
+        with open(self.dead_letter_path, 'a', encoding='utf-8') as dead:
+            for seq, record in entries:
+                dead.write(json_codec.dumps([seq, record]) + '\n')
+            dead.flush()
+            if self.fsync:
+                os.fsync(dead.fileno())
+        self._dead_lettered += len(entries)
+        logger.error('%d sessões movidas para %s após falhas repetidas', len(entries), self.dead_letter_path)
+
+    def _persist(self, records):
+        with self.app.app_context():
+            try:
+                self.persist(records)
+                return True
+            except Exception:
+                logger.exception('Falha ao gravar lote de %d sessões', len(records))
+                return False
+
+    def _write_marker(self, seq):
+        tmp_path = self.marker_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as marker:
+            marker.write(str(seq))
+            marker.flush()
+            if self.fsync:
+                os.fsync(marker.fileno())
+        os.replace(tmp_path, self.marker_path)
+
+    def _mark_committed(self, seq):
+        with self._lock:
+            self._committed_seq = seq
+            if self._queue.empty() and seq == self._last_seq:
+                # Tudo gravado: o spool pode ser esvaziado
+                self._spool.truncate(0)
+                self._spool.seek(0)
+                self._last_seq = self._committed_seq = 0
+                self._write_marker(0)
+            else:
+                self._write_marker(seq)
+
+
+def _read_marker(marker_path):
+    try:
+        with open(marker_path, encoding='utf-8') as marker:
+            return int(marker.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _read_spool(spool):
+    """(seq, registro) de cada linha completa de um spool aberto"""
+    for line in spool:
+        try:
+            seq, record = json_codec.loads(line)
+        except ValueError:
+            continue  # linha incompleta de uma queda durante a escrita
+        yield seq, record
+
+
+def _read_dead_letters(path):
+    try:
+        with open(path, encoding='utf-8') as dead:
+            return [record for _, record in _read_spool(dead)]
+    except OSError:
+        return []
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass